@@ -45,16 +45,57 @@ class CurrencyDict(Enum):
     }
 
 
+# INFO: sign -> currency value map, precomputed once instead of scanning CurrencyDict per spend
+CURRENCY_BY_SIGN: dict[str, str] = {currency.value['sign']: currency.value['value'] for currency in CurrencyDict}
+
+
 class Settings:
     FRONTEND_URL: str = os.getenv('NIFFLER_FRONTEND_URL')
     AUTH_URL: str = os.getenv('NIFFLER_AUTH_URL')
     REGISTRATION_URL = os.getenv('NIFFLER_REGISTRATION_URL')
+    GATEWAY_URL: str = os.getenv('NIFFLER_GATEWAY_URL')
     AUTH_DB_URL: str = os.getenv('NIFFLER_AUTH_DB_URL')
     CURRENCY_DB_URL: str = os.getenv('NIFFLER_CURRENCY_DB_URL')
     SPEND_DB_URL: str = os.getenv('NIFFLER_SPEND_DB_URL')
     USERDATA_DB_URL: str = os.getenv('NIFFLER_USERDATA_DB_URL')
     REGISTERED_USERNAME: str = os.getenv('REGISTERED_USERNAME')
     FRIEND_USERNAME = os.getenv('FRIEND_USERNAME')
+    # Время жизни закэшированного storage state авторизованного пользователя (в секундах)
+    AUTH_STATE_TTL: int = int(os.getenv('NIFFLER_AUTH_STATE_TTL') or 1800)
+    # Профиль фильтрации сети тестового браузера (по умолчанию выключен)
+    BLOCK_RESOURCES: bool = (os.getenv('NIFFLER_BLOCK_RESOURCES') or '').lower() in ('1', 'true', 'yes')
+    BLOCKED_RESOURCE_TYPES: list[str] = (os.getenv('NIFFLER_BLOCKED_RESOURCE_TYPES') or 'image,media,font').split(',')
+    BLOCKED_ORIGINS: list[str] = [origin for origin in (os.getenv('NIFFLER_BLOCKED_ORIGINS') or '').split(',') if origin]
+    # Пул прогретых контекстов браузера (по умолчанию выключен - новый контекст на каждый тест):
+    # размер (0 - без пула) и политика сброса (clear / keep_auth / recreate)
+    CONTEXT_POOL_SIZE: int = int(os.getenv('NIFFLER_CONTEXT_POOL_SIZE') or 0)
+    CONTEXT_RESET_POLICY: str = os.getenv('NIFFLER_CONTEXT_RESET_POLICY') or 'clear'
+    # Настройки пулов соединений к БД (общие для всех сервисов одной БД)
+    DB_POOL_SIZE: int = int(os.getenv('NIFFLER_DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW: int = int(os.getenv('NIFFLER_DB_MAX_OVERFLOW') or 10)
+    DB_POOL_PRE_PING: bool = (os.getenv('NIFFLER_DB_POOL_PRE_PING') or 'true').lower() in ('1', 'true', 'yes')
+    DB_POOL_RECYCLE: int = int(os.getenv('NIFFLER_DB_POOL_RECYCLE') or 1800)
+    # Стоимость bcrypt для паролей пользователей, заводимых напрямую в БД auth
+    AUTH_BCRYPT_ROUNDS: int = int(os.getenv('NIFFLER_AUTH_BCRYPT_ROUNDS') or 4)
+    # Сколько пользователей заводить в пул заранее (на каждый воркер)
+    USER_POOL_SIZE: int = int(os.getenv('NIFFLER_USER_POOL_SIZE') or 4)
+    # Ожидание eventual consistency в БД: таймаут, шаги backoff и push-уведомления через LISTEN/NOTIFY
+    DB_AWAIT_TIMEOUT: float = float(os.getenv('NIFFLER_DB_AWAIT_TIMEOUT') or 10)
+    DB_AWAIT_INITIAL_DELAY: float = float(os.getenv('NIFFLER_DB_AWAIT_INITIAL_DELAY') or 0.02)
+    DB_AWAIT_MAX_DELAY: float = float(os.getenv('NIFFLER_DB_AWAIT_MAX_DELAY') or 0.5)
+    DB_NOTIFY: bool = (os.getenv('NIFFLER_DB_NOTIFY') or '').lower() in ('1', 'true', 'yes')
+    # Порог медленного SQL запроса для лога (в миллисекундах)
+    SLOW_QUERY_MS: float = float(os.getenv('NIFFLER_SLOW_QUERY_MS') or 100)
+    # Размер LRU кэша username -> UUID пользователя (0 - не кэшировать)
+    USER_ID_CACHE_SIZE: int = int(os.getenv('NIFFLER_USER_ID_CACHE_SIZE') or 1024)
+    # Размер пачки при потоковом чтении трат через server-side cursor
+    SPEND_STREAM_BATCH_SIZE: int = int(os.getenv('NIFFLER_SPEND_STREAM_BATCH_SIZE') or 1000)
+    # Размер одного COPY при массовой генерации трат (services/spend_seeder.py)
+    SEED_CHUNK_SIZE: int = int(os.getenv('NIFFLER_SEED_CHUNK_SIZE') or 50000)
+    # Сколько пользователей удаляется одним DELETE ... IN при массовой очистке (services/cleanup_service.py)
+    CLEANUP_BATCH_SIZE: int = int(os.getenv('NIFFLER_CLEANUP_BATCH_SIZE') or 500)
+    # Seed генератора тестовых данных, по умолчанию случайный (печатается в заголовке прогона)
+    SEED: int | None = int(os.getenv('NIFFLER_SEED')) if os.getenv('NIFFLER_SEED') else None
 
 
 settings = Settings()
@@ -0,0 +1,27 @@
+from sqlalchemy.orm import registry
+from sqlmodel import SQLModel, Field
+
+
+class AuthBase(SQLModel, registry=registry()):
+    """Base for niffler-auth tables: own metadata, because table "user" also exists in userdata"""
+    pass
+
+
+class AuthUser(AuthBase, table=True):
+    __tablename__ = 'user'
+
+    id: str = Field(primary_key=True)
+    username: str = Field(unique=True)
+    password: str
+    enabled: bool = Field(default=True)
+    account_non_expired: bool = Field(default=True)
+    account_non_locked: bool = Field(default=True)
+    credentials_non_expired: bool = Field(default=True)
+
+
+class Authority(AuthBase, table=True):
+    __tablename__ = 'authority'
+
+    id: str = Field(primary_key=True)
+    user_id: str
+    authority: str
@@ -13,6 +13,16 @@ class User(SQLModel, table=True):
     full_name: str | None = Field(nullable=True)
 
 
+class UserInfo(SQLModel):
+    """Lightweight projection of User without photo blobs"""
+    id: str
+    username: str
+    currency: str
+    firstname: str | None = None
+    surname: str | None = None
+    full_name: str | None = None
+
+
 class UserCreate(SQLModel):
     username: str
     password: str
@@ -0,0 +1,67 @@
+import uuid
+from functools import lru_cache
+from typing import List, Sequence
+
+import bcrypt
+from sqlalchemy import delete
+from sqlmodel import Session, exists, select
+
+from config import settings
+from models.auth_user import AuthUser, Authority
+from models.user import UserCreate
+from .base_service import BaseService
+
+
+AUTHORITIES: List[str] = ['read', 'write']
+
+
+@lru_cache
+def encode_password(password: str) -> str:
+    """Encode password the way niffler-auth DelegatingPasswordEncoder does ({bcrypt} prefix).
+
+    Hash is cached per password: bcrypt is slow by design and a salted hash can be shared by many test users.
+    """
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=settings.AUTH_BCRYPT_ROUNDS))
+    return '{bcrypt}' + hashed.decode()
+
+
+class AuthService(BaseService):
+    def user_exists(self, username: str) -> bool:
+        """A fast way to check if auth user exists without fetching the entire model"""
+        with Session(self.engine) as session:
+            stmt = select(exists().where(AuthUser.username == username))
+            return session.exec(stmt).first()
+
+    def create_users(self, users: Sequence[UserCreate]) -> List[str]:
+        """Insert enabled auth users with encoded passwords and read/write authorities in one transaction"""
+        user_ids: List[str] = []
+        with Session(self.engine) as session:
+            for user in users:
+                user_id = str(uuid.uuid4())
+                user_ids.append(user_id)
+                session.add(AuthUser(id=user_id, username=user.username, password=encode_password(user.password)))
+            # Flush users first because of fk_authorities_users
+            session.flush()
+            session.add_all([
+                Authority(id=str(uuid.uuid4()), user_id=user_id, authority=authority)
+                for user_id in user_ids for authority in AUTHORITIES
+            ])
+            session.commit()
+        return user_ids
+
+    def delete_users(self, usernames: Sequence[str]) -> int:
+        """Delete auth users with their authorities, return number of deleted users"""
+        with Session(self.engine) as session:
+            deleted = self.purge_users(session, usernames)
+            session.commit()
+            return deleted
+
+    def purge_users(self, session: Session, usernames: Sequence[str]) -> int:
+        """Delete auth users with authorities within session's transaction (no commit), return number of deleted users"""
+        user_ids = select(AuthUser.id).where(AuthUser.username.in_(usernames))
+        session.exec(delete(Authority).where(Authority.user_id.in_(user_ids)))
+        result = session.exec(delete(AuthUser).where(AuthUser.username.in_(usernames)))
+        return result.rowcount
+
+
+auth_service = AuthService(settings.AUTH_DB_URL)
@@ -1,13 +1,152 @@
-from sqlalchemy import Engine
+import select as io_select
+import time
+from threading import Lock
+from typing import Callable, Dict
+
+from sqlalchemy import Connection, Engine, Select
 from sqlmodel import create_engine
 
+from config import settings
+from .query_stats import query_recorder
+
+
+# INFO: engine registry keyed by DB url - services pointing at the same database share one pool
+_engines: Dict[str, Engine] = {}
+_engines_lock = Lock()
+
+
+def get_engine(db_url: str) -> Engine:
+    """Get shared engine for db_url, it is created lazily on first use"""
+    engine = _engines.get(db_url)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(db_url)
+            if engine is None:
+                engine = create_engine(
+                    db_url,
+                    pool_size=settings.DB_POOL_SIZE,
+                    max_overflow=settings.DB_MAX_OVERFLOW,
+                    pool_pre_ping=settings.DB_POOL_PRE_PING,
+                    pool_recycle=settings.DB_POOL_RECYCLE,
+                )
+                query_recorder.attach(engine)
+                _engines[db_url] = engine
+    return engine
+
+
+def warm_up_engine(db_url: str) -> None:
+    """Create engine for db_url and open its first pooled connection with a ping"""
+    with get_engine(db_url).connect() as connection:
+        connection.exec_driver_sql('SELECT 1')
+
+
+def dispose_engines() -> None:
+    """Close all pooled connections of all engines (at session end)"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+# INFO: generic trigger function, notifies the channel passed as the first trigger argument
+NOTIFY_FUNCTION_SQL = """
+CREATE OR REPLACE FUNCTION niffler_test_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(TG_ARGV[0], TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+DROP_NOTIFY_FUNCTION_SQL = """
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger JOIN pg_proc ON pg_proc.oid = pg_trigger.tgfoid
+        WHERE pg_proc.proname = 'niffler_test_notify'
+    ) THEN
+        DROP FUNCTION IF EXISTS niffler_test_notify();
+    END IF;
+END
+$$
+"""
+
+
+def get_notify_trigger_name(table: str, channel: str) -> str:
+    return f'{table}_{channel}_notify'
+
 
 class BaseService:
-    engine: Engine
     db_url: str | None
 
     def __init__(self, db_url: str | None) -> None:
         self.db_url = db_url
+
+    @property
+    def engine(self) -> Engine:
         if self.db_url is None:
             raise ValueError(f'DB url is not set for {self.__class__.__name__}')
-        self.engine = create_engine(self.db_url)
+        return get_engine(self.db_url)
+
+    def await_condition(self, query: Select, timeout: float = settings.DB_AWAIT_TIMEOUT, channel: str | None = None) -> bool:
+        """Wait until query (e.g. select(exists().where(...))) returns true, return False on timeout.
+
+        Polls on one pooled connection with exponential backoff. If channel is given, LISTENs on it and
+        wakes up on NOTIFY (see install_notify_trigger) instead of sleeping the whole backoff interval.
+        """
+        deadline = time.monotonic() + timeout
+        delay = settings.DB_AWAIT_INITIAL_DELAY
+        with self.engine.connect() as connection:
+            if channel is not None:
+                connection.exec_driver_sql(f'LISTEN "{channel}"')
+                connection.commit()
+            try:
+                while True:
+                    result = connection.execute(query).scalar()
+                    # End the transaction so the next check sees fresh commits and notifications are delivered
+                    connection.rollback()
+                    if result:
+                        return True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    if channel is not None:
+                        self._wait_for_notify(connection, min(delay, remaining))
+                    else:
+                        time.sleep(min(delay, remaining))
+                    delay = min(delay * 2, settings.DB_AWAIT_MAX_DELAY)
+            finally:
+                if channel is not None:
+                    connection.exec_driver_sql(f'UNLISTEN "{channel}"')
+                    connection.commit()
+
+    @staticmethod
+    def _wait_for_notify(connection: Connection, timeout: float) -> None:
+        raw_connection = connection.connection.dbapi_connection
+        if io_select.select([raw_connection], [], [], timeout)[0]:
+            raw_connection.poll()
+            raw_connection.notifies.clear()
+
+    def install_notify_trigger(self, table: str, channel: str) -> Callable[[], None]:
+        """Create a statement-level trigger that NOTIFYs channel on any change of table (test DBs only).
+
+        Returns a teardown callable (see uninstall_notify_trigger), call it at session end:
+        otherwise the trigger stays in the app DB and every write pays for a NOTIFY.
+        """
+        trigger = get_notify_trigger_name(table, channel)
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(NOTIFY_FUNCTION_SQL)
+            connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS "{trigger}" ON "{table}"')
+            connection.exec_driver_sql(
+                f'CREATE TRIGGER "{trigger}" AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+                f'FOR EACH STATEMENT EXECUTE FUNCTION niffler_test_notify(\'{channel}\')'
+            )
+        return lambda: self.uninstall_notify_trigger(table, channel)
+
+    def uninstall_notify_trigger(self, table: str, channel: str) -> None:
+        """Drop the trigger and niffler_test_notify() once no other trigger uses it.
+
+        Under xdist the first worker to finish drops the shared trigger, the rest just fall back to polling.
+        """
+        with self.engine.begin() as connection:
+            connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS "{get_notify_trigger_name(table, channel)}" ON "{table}"')
+            connection.exec_driver_sql(DROP_NOTIFY_FUNCTION_SQL)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Sequence
+
+from sqlmodel import Session
+
+from config import settings
+from .auth_service import auth_service
+from .base_service import BaseService
+from .spend_service import spend_service
+from .user_service import user_service
+
+
+class CleanupService:
+    """Удаление данных пользователей сразу во всех БД Niffler.
+
+    Каждая БД чистится в своём соединении и в одной транзакции, все БД параллельно.
+    Общей транзакции между БД нет: если одна из них упадёт, остальные уже могут быть закоммичены,
+    но повторный вызов просто доудалит оставшееся.
+    """
+    databases: Dict[str, BaseService]  # Имя БД -> сервис с методом purge_users(session, usernames)
+    batch_size: int
+
+    def __init__(self, batch_size: int = settings.CLEANUP_BATCH_SIZE) -> None:
+        self.databases = {
+            'spend': spend_service,
+            'userdata': user_service,
+            'auth': auth_service,
+        }
+        self.batch_size = batch_size
+
+    def delete_users(self, usernames: Sequence[str]) -> Dict[str, int]:
+        """Delete users with all related entities from every database, return deleted rows count per database"""
+        usernames = list(dict.fromkeys(usernames))
+        if not usernames:
+            return {name: 0 for name in self.databases}
+        with ThreadPoolExecutor(max_workers=len(self.databases), thread_name_prefix='cleanup') as executor:
+            futures = {
+                name: executor.submit(self._purge, service, usernames)
+                for name, service in self.databases.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+
+    def delete_user(self, username: str) -> Dict[str, int]:
+        return self.delete_users([username])
+
+    def _purge(self, service: BaseService, usernames: Sequence[str]) -> int:
+        deleted = 0
+        with Session(service.engine) as session:
+            # INFO: batches keep IN lists short, but all of them go into the same transaction
+            for start in range(0, len(usernames), self.batch_size):
+                deleted += service.purge_users(session, usernames[start:start + self.batch_size])
+            session.commit()
+        return deleted
+
+
+cleanup_service = CleanupService()
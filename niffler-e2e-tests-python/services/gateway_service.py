@@ -0,0 +1,118 @@
+from datetime import datetime
+from typing import Callable, List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import settings, SPEND_CREATE_DATE_FORMAT
+from models.category import Category
+from models.spend import Spend, SpendCreate
+
+
+def create_http_session(pool_size: int = 10) -> requests.Session:
+    """Keep-alive HTTP сессия с пулом соединений до gateway"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# INFO: one pooled session per process, all gateway clients reuse its connections
+http_session: requests.Session = create_http_session()
+
+
+class GatewayService:
+    """Arrange-слой поверх REST API niffler-gateway от имени одного пользователя"""
+    base_url: str
+    username: str
+    token_provider: Callable[[bool], str]
+    _token: str | None
+
+    def __init__(self, username: str, token_provider: Callable[[bool], str], base_url: str | None = settings.GATEWAY_URL) -> None:
+        """token_provider(refresh) returns an id_token; refresh=True asks for a fresh one after 401"""
+        if base_url is None:
+            raise ValueError(f'Gateway url is not set for {self.__class__.__name__}')
+        self.base_url = base_url.rstrip('/')
+        self.username = username
+        self.token_provider = token_provider
+        self._token = None
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Выполнить запрос с токеном пользователя, при 401 один раз обновить токен и повторить"""
+        if self._token is None:
+            self._token = self.token_provider(False)
+        response = self._send(method, path, **kwargs)
+        if response.status_code == 401:
+            self._token = self.token_provider(True)
+            response = self._send(method, path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        headers = {'Authorization': f'Bearer {self._token}'}
+        return http_session.request(method, f'{self.base_url}{path}', headers=headers, timeout=10, **kwargs)
+
+    # INFO: spends and categories
+
+    def add_category(self, name: str) -> Category:
+        response = self._request('POST', '/api/categories/add', json={'name': name, 'archived': False})
+        return self._to_category(response.json())
+
+    def archive_category(self, category: Category) -> Category:
+        payload = {'id': category.id, 'name': category.name, 'archived': True}
+        response = self._request('PATCH', '/api/categories/update', json=payload)
+        return self._to_category(response.json())
+
+    def get_categories(self, exclude_archived: bool = False) -> List[Category]:
+        response = self._request('GET', '/api/categories/all', params={'excludeArchived': exclude_archived})
+        return [self._to_category(category) for category in response.json()]
+
+    def add_spend(self, spend: SpendCreate) -> Spend:
+        """Добавить трату; категория создаётся gateway по имени, если её ещё нет"""
+        payload = {
+            'amount': spend.amount,
+            'currency': spend.currency,
+            'category': {'name': spend.category, 'archived': False},
+            'spendDate': datetime.strptime(spend.spend_date, SPEND_CREATE_DATE_FORMAT).date().isoformat(),
+            'description': spend.description,
+        }
+        response = self._request('POST', '/api/spends/add', json=payload)
+        return self._to_spend(response.json())
+
+    def delete_spends(self, spend_ids: List[str]) -> None:
+        self._request('DELETE', '/api/spends/remove', params={'ids': spend_ids})
+
+    # INFO: friends and invitations
+
+    def send_invitation(self, username: str) -> None:
+        self._request('POST', '/api/invitations/send', json={'username': username})
+
+    def accept_invitation(self, username: str) -> None:
+        self._request('POST', '/api/invitations/accept', json={'username': username})
+
+    def decline_invitation(self, username: str) -> None:
+        self._request('POST', '/api/invitations/decline', json={'username': username})
+
+    def remove_friend(self, username: str) -> None:
+        self._request('DELETE', '/api/friends/remove', params={'username': username})
+
+    def get_friends(self) -> List[str]:
+        response = self._request('GET', '/api/friends/all')
+        return [friend['username'] for friend in response.json()]
+
+    # INFO: json -> models
+
+    def _to_category(self, data: dict) -> Category:
+        return Category(id=data['id'], name=data['name'], username=data.get('username') or self.username, archived=data['archived'])
+
+    def _to_spend(self, data: dict) -> Spend:
+        return Spend(
+            id=data['id'],
+            username=data.get('username') or self.username,
+            spend_date=datetime.fromisoformat(data['spendDate'][:10]).date(),
+            currency=data['currency'],
+            amount=data['amount'],
+            description=data.get('description') or '',
+            category_id=data['category']['id'],
+        )
@@ -0,0 +1,29 @@
+from typing import List, Sequence
+
+from models.user import UserCreate
+from .auth_service import auth_service
+from .cleanup_service import cleanup_service
+from .user_service import user_service
+
+
+class ProvisioningService:
+    """Заведение тестовых пользователей напрямую в БД auth и userdata, минуя регистрацию через браузер"""
+
+    def provision_users(self, users: Sequence[UserCreate]) -> List[str]:
+        """Create fully usable users: auth user with authorities plus userdata row, return userdata ids"""
+        usernames = [user.username for user in users]
+        # Leftovers of an interrupted run would break unique usernames
+        self.deprovision_users(usernames)
+        auth_service.create_users(users)
+        return user_service.create_users(usernames)
+
+    def provision_user(self, user: UserCreate) -> UserCreate:
+        self.provision_users([user])
+        return user
+
+    def deprovision_users(self, usernames: Sequence[str]) -> None:
+        """Delete users with related entities from userdata, spend and auth databases (concurrently)"""
+        cleanup_service.delete_users(usernames)
+
+
+provisioning_service = ProvisioningService()
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from sqlalchemy import Engine, event
+
+from config import settings
+
+
+logger = logging.getLogger('niffler.sql')
+
+
+@dataclass
+class QueryStats:
+    """Статистика SQL запросов за период: число запросов, строк, суммарное время и повторы"""
+    statements: int = 0
+    rows: int = 0
+    duration: float = 0.0
+    executions: Counter = field(default_factory=Counter)  # (statement, parameters) -> число выполнений
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Одинаковые запросы с одинаковыми параметрами, выполненные threshold и более раз (признак N+1)"""
+        return [(statement, count) for (statement, _), count in self.executions.most_common() if count >= threshold]
+
+    def summary(self) -> str:
+        return f'{self.statements} statements, {self.rows} rows, {self.duration * 1000:.1f} ms'
+
+
+class QueryRecorder:
+    """Считает запросы всех engine через события SQLAlchemy"""
+    stats: QueryStats
+    _lock: threading.Lock
+    _paused: int  # Глубина вложенных paused()
+
+    def __init__(self) -> None:
+        self.stats = QueryStats()
+        self._lock = threading.Lock()
+        self._paused = 0
+
+    def attach(self, engine: Engine) -> None:
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def reset(self) -> QueryStats:
+        """Начать новый период, вернуть статистику за прошлый"""
+        with self._lock:
+            stats, self.stats = self.stats, QueryStats()
+            return stats
+
+    @contextmanager
+    def paused(self):
+        """Не считать запросы внутри блока (инфраструктура теста, а не сам тест).
+
+        Пауза действует на все потоки: инфраструктура сама уходит в пулы потоков (например, cleanup_service).
+        Медленные запросы логируются и на паузе.
+        """
+        with self._lock:
+            self._paused += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._paused -= 1
+
+    @staticmethod
+    def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany) -> None:
+        connection.info.setdefault('query_started', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, connection, cursor, statement, parameters, context, executemany) -> None:
+        duration = time.perf_counter() - connection.info['query_started'].pop()
+        rows = max(cursor.rowcount, 0)
+        if duration * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning('Slow query (%.1f ms, %s rows): %s %r', duration * 1000, rows, statement, parameters)
+        with self._lock:
+            if self._paused:
+                return
+            self.stats.statements += 1
+            self.stats.rows += rows
+            self.stats.duration += duration
+            self.stats.executions[(statement, repr(parameters))] += 1
+
+
+# INFO: one recorder per process, attached to every engine created by the registry
+query_recorder = QueryRecorder()
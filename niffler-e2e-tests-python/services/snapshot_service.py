@@ -0,0 +1,77 @@
+from dataclasses import dataclass, field
+from typing import List, Sequence, Set, Tuple
+
+from sqlalchemy import delete, or_, tuple_, update
+from sqlmodel import Session, select
+
+from models.category import Category
+from models.friendship import Friendship
+from models.spend import Spend
+from models.user import User
+from .spend_service import spend_service
+from .user_service import user_service
+
+
+@dataclass
+class DbSnapshot:
+    """Состояние строк, принадлежащих тестовым пользователям, в spend и userdata БД"""
+    usernames: List[str]
+    user_ids: List[str]
+    spend_ids: Set[str] = field(default_factory=set)
+    category_ids: Set[str] = field(default_factory=set)
+    archived_category_ids: Set[str] = field(default_factory=set)
+    friendships: Set[Tuple[str, str]] = field(default_factory=set)  # (requester_id, addressee_id)
+
+
+class SnapshotService:
+    """Снимок и откат данных тестовых пользователей.
+
+    Откат удаляет всё, что появилось у пользователей после снимка, и возвращает флаг archived
+    категориям из снимка. Число запросов не зависит от того, сколько данных создал тест.
+    """
+
+    def take(self, usernames: Sequence[str]) -> DbSnapshot:
+        with Session(user_service.engine) as session:
+            user_ids = list(session.exec(select(User.id).where(User.username.in_(usernames))).all())
+            friendships = session.exec(select(Friendship.requester_id, Friendship.addressee_id).where(or_(
+                Friendship.requester_id.in_(user_ids),
+                Friendship.addressee_id.in_(user_ids)
+            ))).all()
+        with Session(spend_service.engine) as session:
+            spend_ids = session.exec(select(Spend.id).where(Spend.username.in_(usernames))).all()
+            categories = session.exec(
+                select(Category.id, Category.archived).where(Category.username.in_(usernames))
+            ).all()
+        return DbSnapshot(
+            usernames=list(usernames),
+            user_ids=user_ids,
+            spend_ids={str(spend_id) for spend_id in spend_ids},
+            category_ids={str(category_id) for category_id, _ in categories},
+            archived_category_ids={str(category_id) for category_id, archived in categories if archived},
+            friendships={(str(requester_id), str(addressee_id)) for requester_id, addressee_id in friendships},
+        )
+
+    def restore(self, snapshot: DbSnapshot) -> None:
+        """Вернуть данные пользователей снимка к состоянию на момент take"""
+        with Session(spend_service.engine) as session:
+            session.exec(delete(Spend).where(
+                Spend.username.in_(snapshot.usernames),
+                Spend.id.not_in(snapshot.spend_ids)
+            ))
+            session.exec(delete(Category).where(
+                Category.username.in_(snapshot.usernames),
+                Category.id.not_in(snapshot.category_ids)
+            ))
+            session.exec(update(Category).where(
+                Category.id.in_(snapshot.category_ids)
+            ).values(archived=Category.id.in_(snapshot.archived_category_ids)))
+            session.commit()
+        with Session(user_service.engine) as session:
+            session.exec(delete(Friendship).where(
+                or_(Friendship.requester_id.in_(snapshot.user_ids), Friendship.addressee_id.in_(snapshot.user_ids)),
+                tuple_(Friendship.requester_id, Friendship.addressee_id).not_in(snapshot.friendships)
+            ))
+            session.commit()
+
+
+snapshot_service = SnapshotService()
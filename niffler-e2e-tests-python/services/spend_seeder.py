@@ -0,0 +1,143 @@
+import argparse
+import csv
+import io
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from itertools import accumulate
+from typing import AbstractSet, Iterator, List, Sequence
+
+from config import settings, CurrencyDict, MIN_AMOUNT, MAX_AMOUNT, MIN_DATE, MAX_DATE
+from models.category import Category
+from .spend_service import spend_service
+
+
+CATEGORY_BASE_NAMES: Sequence[str] = (
+    'groceries', 'restaurants', 'transport', 'utilities', 'health',
+    'entertainment', 'clothes', 'travel', 'education', 'gifts',
+)
+DESCRIPTIONS: Sequence[str] = ('', '', '', 'weekly', 'monthly', 'with family', 'online', 'cashback', 'discount')
+SPEND_COLUMNS: Sequence[str] = ('id', 'username', 'spend_date', 'currency', 'amount', 'description', 'category_id')
+CATEGORY_COLUMNS: Sequence[str] = ('id', 'name', 'username', 'archived')
+
+
+@dataclass
+class SeedResult:
+    username: str
+    categories: List[Category]
+    spend_count: int
+    duration: float
+
+    def summary(self) -> str:
+        rate = self.spend_count / self.duration if self.duration else 0
+        return (f'Seeded {self.spend_count} spends in {len(self.categories)} categories for {self.username} '
+                f'in {self.duration:.1f}s ({rate:.0f} rows/s)')
+
+
+class SpendSeeder:
+    """Генератор большого объёма трат и категорий, загружает их в spend БД через COPY.
+
+    Данные полностью определяются seed: один и тот же seed даёт те же id, суммы, даты и категории.
+    Категории распределены неравномерно (вес категории i равен 1 / (i + 1)), как у реальных пользователей.
+    """
+    seed: int
+    chunk_size: int
+    _random: random.Random
+
+    def __init__(self, seed: int, chunk_size: int = settings.SEED_CHUNK_SIZE) -> None:
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+
+    def _uuid(self) -> str:
+        return str(uuid.UUID(int=self._random.getrandbits(128), version=4))
+
+    def generate_categories(self, username: str, count: int, taken: AbstractSet[str] = frozenset()) -> List[Category]:
+        """Generate count categories with names unique per user, names from taken (already in DB) are skipped"""
+        categories: List[Category] = []
+        index = 0
+        while len(categories) < count:
+            # Names stay unique per user: groceries, ..., gifts, groceries_1, ...
+            name, suffix = CATEGORY_BASE_NAMES[index % len(CATEGORY_BASE_NAMES)], index // len(CATEGORY_BASE_NAMES)
+            name = f'{name}_{suffix}' if suffix else name
+            index += 1
+            if name not in taken:
+                categories.append(Category(id=self._uuid(), name=name, username=username, archived=False))
+        return categories
+
+    def generate_spend_rows(self, username: str, categories: Sequence[Category], count: int) -> Iterator[List[tuple]]:
+        """Yield chunks of spend rows in SPEND_COLUMNS order, each chunk is generated with a few bulk random calls"""
+        category_ids = [category.id for category in categories]
+        cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(category_ids))))
+        currencies = [currency.value['value'] for currency in CurrencyDict]
+        days = range((MAX_DATE - MIN_DATE).days + 1)
+        cents = range(MIN_AMOUNT * 100, MAX_AMOUNT * 100 + 1)
+        min_day = MIN_DATE.date().toordinal()
+
+        for start in range(0, count, self.chunk_size):
+            size = min(self.chunk_size, count - start)
+            spend_ids = [self._uuid() for _ in range(size)]
+            yield list(zip(
+                spend_ids,
+                [username] * size,
+                (date.fromordinal(min_day + day) for day in self._random.choices(days, k=size)),
+                self._random.choices(currencies, k=size),
+                (f'{amount / 100:.2f}' for amount in self._random.choices(cents, k=size)),
+                self._random.choices(DESCRIPTIONS, k=size),
+                self._random.choices(category_ids, cum_weights=cum_weights, k=size),
+            ))
+
+    def seed_user(self, username: str, spend_count: int, category_count: int = len(CATEGORY_BASE_NAMES),
+                  replace: bool = True) -> SeedResult:
+        """Load category_count categories and spend_count spends of username in one transaction"""
+        started = time.perf_counter()
+        if replace:
+            spend_service.delete_user_spends(username)
+            taken: AbstractSet[str] = frozenset()
+        else:
+            # INFO: category (name, username) is unique, so do not generate names the user already has
+            taken = spend_service.get_user_category_names(username)
+        categories = self.generate_categories(username, category_count, taken)
+        raw_connection = spend_service.engine.raw_connection()
+        try:
+            with raw_connection.cursor() as cursor:
+                self._copy(cursor, 'category', CATEGORY_COLUMNS, [
+                    (category.id, category.name, category.username, category.archived) for category in categories
+                ])
+                for rows in self.generate_spend_rows(username, categories, spend_count):
+                    self._copy(cursor, 'spend', SPEND_COLUMNS, rows)
+            raw_connection.commit()
+        except Exception:
+            raw_connection.rollback()
+            raise
+        finally:
+            raw_connection.close()
+        return SeedResult(username, categories, spend_count, time.perf_counter() - started)
+
+    @staticmethod
+    def _copy(cursor, table: str, columns: Sequence[str], rows: Sequence[tuple]) -> None:
+        buffer = io.StringIO()
+        # INFO: COPY csv reads an unquoted empty field as NULL, quote everything so '' stays an empty string
+        csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(rows)
+        buffer.seek(0)
+        cursor.copy_expert(f'COPY "{table}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load synthetic spends into the Niffler spend database')
+    parser.add_argument('username', nargs='+', help='Owner(s) of generated spends')
+    parser.add_argument('--spends', type=int, default=100_000, help='Number of spends per user')
+    parser.add_argument('--categories', type=int, default=len(CATEGORY_BASE_NAMES), help='Number of categories per user')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true', help='Do not delete existing spends and categories of the user')
+    args = parser.parse_args()
+
+    seeder = SpendSeeder(args.seed)
+    for username in args.username:
+        print(seeder.seed_user(username, args.spends, args.categories, replace=not args.keep).summary())
+
+
+if __name__ == '__main__':
+    main()
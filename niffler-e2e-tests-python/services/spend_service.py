@@ -1,6 +1,7 @@
-from typing import Sequence
+from datetime import date
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
 
-from sqlalchemy import func
+from sqlalchemy import delete, func
 from sqlmodel import Session, exists, select
 
 from config import settings
@@ -21,6 +22,54 @@ class SpendService(BaseService):
             stmt = select(Spend).where(Spend.username == username)
             return session.exec(stmt).all()
 
+    def iter_user_spend_batches(self, username: str,
+                                batch_size: int = settings.SPEND_STREAM_BATCH_SIZE) -> Iterator[List[Spend]]:
+        """Stream user spends in batches through a server-side cursor, only one batch is held in memory"""
+        with Session(self.engine) as session:
+            stmt = (
+                select(Spend)
+                .where(Spend.username == username)
+                .order_by(Spend.spend_date, Spend.id)
+                .execution_options(yield_per=batch_size)
+            )
+            for batch in session.exec(stmt).partitions():
+                yield batch
+                # Spends of the previous batch are not needed anymore, do not keep them in the identity map
+                session.expunge_all()
+
+    def iter_user_spends(self, username: str, batch_size: int = settings.SPEND_STREAM_BATCH_SIZE) -> Iterator[Spend]:
+        """Same as get_user_spends, but in constant memory (see iter_user_spend_batches)"""
+        for batch in self.iter_user_spend_batches(username, batch_size):
+            yield from batch
+
+    def get_user_spend_totals(self, username: str) -> Dict[str, float]:
+        """Сумма трат пользователя по каждой валюте, считается в БД"""
+        with Session(self.engine) as session:
+            stmt = (
+                select(Spend.currency, func.sum(Spend.amount))
+                .where(Spend.username == username)
+                .group_by(Spend.currency)
+            )
+            return {currency: total for currency, total in session.exec(stmt).all()}
+
+    def get_user_spend_count_by_category(self, username: str) -> Dict[str, int]:
+        """Число трат пользователя по названию категории, считается в БД"""
+        with Session(self.engine) as session:
+            stmt = (
+                select(Category.name, func.count(Spend.id))
+                .join(Category, Category.id == Spend.category_id)
+                .where(Spend.username == username)
+                .group_by(Category.name)
+            )
+            return {name: count for name, count in session.exec(stmt).all()}
+
+    def get_user_spend_date_range(self, username: str) -> Tuple[date | None, date | None]:
+        """Даты первой и последней траты пользователя, (None, None) если трат нет"""
+        with Session(self.engine) as session:
+            stmt = select(func.min(Spend.spend_date), func.max(Spend.spend_date)).where(Spend.username == username)
+            first_date, last_date = session.exec(stmt).one()
+            return first_date, last_date
+
     def get_user_spend_count(self, username: str) -> int:
         """Получить количество трат для конкретного юзера"""
         with Session(self.engine) as session:
@@ -39,19 +88,23 @@ class SpendService(BaseService):
             stmt = select(exists().where(Category.name == category_name))
             return session.exec(stmt).first()
 
-    def delete_user_spends(self, username: str) -> None:
-        """Delete all user spends"""
+    def delete_user_spends(self, username: str) -> int:
+        """Delete all user spends and categories in one transaction, return number of deleted spends"""
+        return self.delete_users_spends([username])
+
+    def delete_users_spends(self, usernames: Sequence[str]) -> int:
+        """Bulk delete spends and categories of many users at once, return number of deleted spends"""
         with Session(self.engine) as session:
-            stmt = select(Spend).where(Spend.username == username)
-            db_spends = session.exec(stmt).all()
-            for db_spend in db_spends:
-                session.delete(db_spend)
-            # Delete categories
-            category_stmt = select(Category).where(Category.username == username)
-            user_categories = session.exec(category_stmt).all()
-            for user_category in user_categories:
-                session.delete(user_category)
+            deleted = self.purge_users(session, usernames)
             session.commit()
+            return deleted
+
+    def purge_users(self, session: Session, usernames: Sequence[str]) -> int:
+        """Delete spends and categories of users within session's transaction (no commit), return number of deleted spends"""
+        spend_result = session.exec(delete(Spend).where(Spend.username.in_(usernames)))
+        # Delete categories after spends because of fk_spend_category
+        session.exec(delete(Category).where(Category.username.in_(usernames)))
+        return spend_result.rowcount
 
     def delete_category(self, category: str) -> None:
         """Delete category from db"""
@@ -61,20 +114,28 @@ class SpendService(BaseService):
             session.delete(db_category)
             session.commit()
 
+    def get_user_category_names(self, username: str) -> Set[str]:
+        """Получить названия всех категорий пользователя"""
+        with Session(self.engine) as session:
+            stmt = select(Category.name).where(Category.username == username)
+            return set(session.exec(stmt).all())
+
     def is_archived(self, category: str) -> bool:
         """Получить статус архивации категории"""
         with Session(self.engine) as session:
             stmt = select(Category.archived).where(Category.name == category)
             return session.exec(stmt).first()
 
-    def delete_user_categories(self, username: str) -> None:
-        """Delete all user spend categories"""
+    def delete_user_categories(self, username: str) -> int:
+        """Delete all user spend categories, return number of deleted rows"""
+        return self.delete_users_categories([username])
+
+    def delete_users_categories(self, usernames: Sequence[str]) -> int:
+        """Bulk delete spend categories of many users at once"""
         with Session(self.engine) as session:
-            stmt = select(Category).where(Category.username == username)
-            db_categories = session.exec(stmt).all()
-            for db_category in db_categories:
-                session.delete(db_category)
+            result = session.exec(delete(Category).where(Category.username.in_(usernames)))
             session.commit()
+            return result.rowcount
 
 
 spend_service = SpendService(settings.SPEND_DB_URL)
@@ -0,0 +1,53 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Iterable
+
+from config import settings
+
+
+class UserIdCache:
+    """Ограниченный LRU кэш username -> UUID пользователя в userdata, общий для всех сервисов одного процесса
+    (у каждого воркера xdist своя копия).
+
+    UUID пользователя не меняется, пока он существует, поэтому запись нужно сбрасывать только
+    при удалении пользователя (см. UserService.purge_users).
+    """
+    max_size: int
+    _ids: 'OrderedDict[str, str]'
+    _lock: Lock
+
+    def __init__(self, max_size: int = settings.USER_ID_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, username: str) -> str | None:
+        with self._lock:
+            user_id = self._ids.get(username)
+            if user_id is not None:
+                self._ids.move_to_end(username)
+            return user_id
+
+    def put(self, username: str, user_id: str) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._ids[username] = str(user_id)
+            self._ids.move_to_end(username)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def invalidate(self, usernames: Iterable[str]) -> None:
+        with self._lock:
+            for username in usernames:
+                self._ids.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+user_id_cache = UserIdCache()
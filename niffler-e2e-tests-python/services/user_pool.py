@@ -0,0 +1,63 @@
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, Sequence
+
+from models.user import UserCreate
+from .provisioning_service import provisioning_service
+from .spend_service import spend_service
+from .user_service import user_service
+
+
+class UserPool:
+    """Пул заранее заведённых пользователей.
+
+    Пользователи заводятся пачкой при старте, выдаются тестам через lease, при возврате у них
+    удаляются траты, категории и дружбы, а в конце сессии весь пул удаляется одной пачкой.
+    """
+    size: int
+    prefix: str
+    password: str
+    _idle: Deque[UserCreate]
+    _user_ids: Dict[str, str]  # username -> userdata id
+    _lock: Lock
+
+    def __init__(self, size: int, prefix: str, password: str = 'pAsSwOrD') -> None:
+        self.size = size
+        self.prefix = prefix
+        self.password = password
+        self._idle = deque()
+        self._user_ids = {}
+        self._lock = Lock()
+
+    def provision(self, count: int | None = None) -> None:
+        """Завести count (по умолчанию size) новых пользователей одной пачкой"""
+        start = len(self._user_ids)
+        users = [
+            UserCreate(username=f'{self.prefix}{index}', password=self.password)
+            for index in range(start, start + (self.size if count is None else count))
+        ]
+        user_ids = provisioning_service.provision_users(users)
+        self._user_ids.update(zip((user.username for user in users), user_ids))
+        self._idle.extend(users)
+
+    def lease(self) -> UserCreate:
+        """Выдать чистого пользователя; если свободных нет, пул подрастает на одного"""
+        with self._lock:
+            if not self._idle:
+                self.provision(1)
+            return self._idle.popleft()
+
+    def release(self, users: Sequence[UserCreate]) -> None:
+        """Вернуть пользователей в пул, сбросив их траты, категории и дружбы"""
+        if not users:
+            return
+        spend_service.delete_users_spends([user.username for user in users])
+        user_service.delete_users_friendships([self._user_ids[user.username] for user in users])
+        with self._lock:
+            self._idle.extend(users)
+
+    def close(self) -> None:
+        """Удалить весь пул из всех БД"""
+        provisioning_service.deprovision_users(list(self._user_ids))
+        self._user_ids.clear()
+        self._idle.clear()
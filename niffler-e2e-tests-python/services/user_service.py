@@ -1,10 +1,18 @@
-from sqlmodel import Session, select, exists, and_, or_
+import uuid
+from typing import List, Sequence, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.orm import aliased, defer
+from sqlmodel import Session, select, exists, func, and_, or_
 
 from config import settings
 from .base_service import BaseService
-from models.user import User
+from models.user import User, UserInfo
 from models.friendship import Friendship
-from .spend_service import spend_service
+from .user_id_cache import user_id_cache
+
+
+USER_CHANGED_CHANNEL: str = 'niffler_user_changed'
 
 
 class UserService(BaseService):
@@ -16,72 +24,145 @@ class UserService(BaseService):
             print(f'User with username {username} exists: {result}')
             return result
 
+    def await_user_exists(self, username: str, timeout: float = settings.DB_AWAIT_TIMEOUT) -> bool:
+        """Wait until user appears in userdata (registration goes auth -> Kafka -> userdata)"""
+        stmt = select(exists().where(User.username == username))
+        channel = USER_CHANGED_CHANNEL if settings.DB_NOTIFY else None
+        return self.await_condition(stmt, timeout, channel)
+
+    def create_users(self, usernames: Sequence[str], currency: str = 'RUB') -> List[str]:
+        """Insert userdata rows directly (what niffler-userdata does on a Kafka registration event)"""
+        user_ids = [str(uuid.uuid4()) for _ in usernames]
+        with Session(self.engine) as session:
+            session.add_all([
+                User(id=user_id, username=username, currency=currency)
+                for user_id, username in zip(user_ids, usernames)
+            ])
+            session.commit()
+        for username, user_id in zip(usernames, user_ids):
+            user_id_cache.put(username, user_id)
+        return user_ids
+
     def get_user_id_by_username(self, username: str) -> str:
-        """Получить UUID пользователя по его нику"""
+        """Получить UUID пользователя по его нику (из кэша, если он уже известен)"""
+        user_id = user_id_cache.get(username)
+        if user_id is not None:
+            return user_id
         with Session(self.engine) as session:
             stmt = select(User.id).where(User.username == username)
             user_id = session.exec(stmt).first()
             if not user_id:
                 raise ValueError(f'User with username {username} does not have UUID!!!')
-            return user_id
+        user_id_cache.put(username, user_id)
+        return str(user_id)
 
     def delete_user(self, username: str) -> str:
-        """Delete user from database if exists and return his username (for any purposes)."""
-        with Session(self.engine) as session:
-            stmt = select(User).where(User.username == username)
-            db_user: User | None = session.exec(stmt).first()
-            if db_user is None:
-                print(f'For some purposes user with username {username} does not exist')
-                return username
-            # INFO: we do not know anything about cascade delete rules in DB so we delete related entities by hand :)
-            # Remove all user spends
-            spend_service.delete_user_spends(username)
-            # Remove all user categories
-            spend_service.delete_user_categories(username)
-            # Remove friendships
-            self.delete_user_friendships(db_user.id)
-            # Finally remove user
-            session.delete(db_user)
-            session.commit()
-            return username
+        """Delete user with related entities from all databases if exists and return his username (for any purposes)."""
+        if self.delete_users([username]) == 0:
+            print(f'For some purposes user with username {username} does not exist')
+        return username
+
+    def delete_user_friendships(self, user_id: str) -> int:
+        """Удалить все имеющиеся дружбы и запросы в друзья, вернуть число удалённых строк"""
+        return self.delete_users_friendships([user_id])
 
-    def delete_user_friendships(self, user_id: str) -> None:
-        """Удалить все имеющиеся дружбы и запросы в друзья"""
+    def delete_users_friendships(self, user_ids: Sequence[str]) -> int:
+        """Удалить дружбы и запросы в друзья сразу для многих пользователей одним DELETE"""
         with Session(self.engine) as session:
-            stmt = select(Friendship).where(or_(
-                Friendship.requester_id == user_id,
-                Friendship.addressee_id == user_id
+            stmt = delete(Friendship).where(or_(
+                Friendship.requester_id.in_(user_ids),
+                Friendship.addressee_id.in_(user_ids)
             ))
-            friendships = session.execute(stmt).all()
-            print(f'Friendships: {friendships}')
-            for friendship in session.exec(stmt).all():
-                session.delete(friendship)
+            result = session.exec(stmt)
             session.commit()
+            return result.rowcount
+
+    def delete_users(self, usernames: Sequence[str]) -> int:
+        """Bulk delete many users with related entities (spends, categories, friendships, auth users),
+        return number of deleted userdata users"""
+        # INFO: lazy import, cleanup_service itself depends on user_service
+        from .cleanup_service import cleanup_service
+        return cleanup_service.delete_users(usernames)['userdata']
+
+    def purge_users(self, session: Session, usernames: Sequence[str]) -> int:
+        """Delete users with friendships within session's transaction (no commit), return number of deleted users"""
+        user_id_cache.invalidate(usernames)
+        user_ids = select(User.id).where(User.username.in_(usernames))
+        session.exec(delete(Friendship).where(or_(
+            Friendship.requester_id.in_(user_ids),
+            Friendship.addressee_id.in_(user_ids)
+        )))
+        result = session.exec(delete(User).where(User.username.in_(usernames)))
+        return result.rowcount
 
-    def get_user_by_username(self, username: str) -> User:
+    def get_user_by_username(self, username: str, with_photos: bool = False) -> User:
+        """Get user model, avatar blobs (photo, photo_small) are not loaded unless with_photos is set"""
         with Session(self.engine) as session:
             stmt = select(User).where(User.username == username)
-            db_user: User | None = session.execute(stmt).first()
+            if not with_photos:
+                stmt = stmt.options(defer(User.photo, raiseload=True), defer(User.photo_small, raiseload=True))
+            db_user: User | None = session.exec(stmt).first()
             if db_user is None:
                 raise ValueError(f'No user with username {username}')
             return db_user
 
+    def get_users_info(self, usernames: Sequence[str]) -> List[UserInfo]:
+        """Names and currency of many users in one query, without touching photo columns"""
+        with Session(self.engine) as session:
+            stmt = select(
+                User.id, User.username, User.currency, User.firstname, User.surname, User.full_name
+            ).where(User.username.in_(usernames))
+            return [UserInfo(**row._mapping) for row in session.exec(stmt).all()]
+
+    def get_user_photos(self, username: str) -> Tuple[bytes | None, bytes | None]:
+        """Load (photo, photo_small) of user explicitly"""
+        with Session(self.engine) as session:
+            row = session.exec(select(User.photo, User.photo_small).where(User.username == username)).first()
+            if row is None:
+                raise ValueError(f'No user with username {username}')
+            return row.photo, row.photo_small
+
     def friend_exists(self, requester_username: str, addressee_username: str) -> bool:
+        """Check accepted friendship in one round trip.
+
+        If both UUIDs are cached, the statement only checks that both users still exist and runs EXISTS
+        over friendship, otherwise users are joined by username in the same statement and their UUIDs are cached
+        for the next checks. A missing user raises ValueError either way.
+        """
+        requester_id = user_id_cache.get(requester_username)
+        addressee_id = user_id_cache.get(addressee_username)
         with Session(self.engine) as session:
-            requester_id_stmt = select(User.id).where(User.username == requester_username)
-            addressee_id_stmt = select(User.id).where(User.username == addressee_username)
-            requester_id: str | None = session.exec(requester_id_stmt).first()
-            addressee_id: str | None = session.exec(addressee_id_stmt).first()
-            if addressee_id is None or requester_id is None:
-                raise ValueError(f'No addressee with username {addressee_username} or requester with username {requester_username}')
-            friendship_stmt = select(exists().where(and_(
-                Friendship.requester_id == requester_id,
-                Friendship.addressee_id == addressee_id,
-                Friendship.status == 'ACCEPTED'
-            )))
-            return session.exec(friendship_stmt).first()
+            if requester_id is not None and addressee_id is not None:
+                users_exist, friendship_exists = session.exec(select(
+                    select(func.count(User.id)).where(User.id.in_([requester_id, addressee_id])).scalar_subquery() == 2,
+                    self._friendship_exists(requester_id, addressee_id),
+                )).one()
+                if users_exist:
+                    return friendship_exists
+                # A cached user was deleted behind the cache, look both up by username
+                user_id_cache.invalidate([requester_username, addressee_username])
 
+            requester = aliased(User)
+            addressee = aliased(User)
+            stmt = (
+                select(requester.id, addressee.id, self._friendship_exists(requester.id, addressee.id))
+                .where(requester.username == requester_username, addressee.username == addressee_username)
+            )
+            row = session.exec(stmt).first()
+        if row is None:
+            raise ValueError(f'No addressee with username {addressee_username} or requester with username {requester_username}')
+        requester_id, addressee_id, friendship_exists = row
+        user_id_cache.put(requester_username, requester_id)
+        user_id_cache.put(addressee_username, addressee_id)
+        return friendship_exists
 
-user_service = UserService(settings.USERDATA_DB_URL)
+    @staticmethod
+    def _friendship_exists(requester_id, addressee_id):
+        return exists().where(and_(
+            Friendship.requester_id == requester_id,
+            Friendship.addressee_id == addressee_id,
+            Friendship.status == 'ACCEPTED'
+        ))
 
 
+user_service = UserService(settings.USERDATA_DB_URL)
@@ -0,0 +1,200 @@
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Coroutine, Dict, List, Sequence, Tuple, TypeVar
+
+from playwright.async_api import (
+    Browser, BrowserContext, Locator, Page, TimeoutError as PlaywrightTimeoutError, async_playwright, expect,
+)
+
+from config import settings
+from models.user import UserCreate
+from .pages import (
+    ALL_ELEMENTS_VISIBLE_JS, FIND_MISSING_ELEMENTS_JS,
+    LoginPage, MainPage, AllPeoplePage, FriendsPage,
+)
+
+T = TypeVar('T')
+
+
+def run_in_event_loop(coroutine: Coroutine[None, None, T]) -> T:
+    """Запустить корутину в отдельном потоке со своим event loop.
+
+    Sync Playwright из фикстур уже занимает текущий поток, поэтому asyncio.run здесь вызвать нельзя.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+@asynccontextmanager
+async def login_concurrently(browser: Browser, users: Sequence[UserCreate]) -> AsyncIterator[List['AsyncMainPage']]:
+    """Залогинить пользователей одновременно, каждого в своём контексте браузера; контексты закрываются на выходе.
+
+    browser должен быть из async_playwright: объекты sync API (сессионный браузер из фикстур) в event loop
+    не передать, поэтому этот слой - для отдельных сценариев со своим экземпляром Playwright.
+    """
+    async def _login(context: BrowserContext, user: UserCreate) -> AsyncMainPage:
+        context.set_default_timeout(10000)
+        login_page = await AsyncLoginPage.open(await context.new_page())
+        return await login_page.login(user)
+
+    contexts: List[BrowserContext] = []
+    try:
+        for _ in users:
+            contexts.append(await browser.new_context())
+        yield list(await asyncio.gather(*(_login(context, user) for context, user in zip(contexts, users))))
+    finally:
+        for context in contexts:
+            await context.close()
+
+
+async def add_friend(inviter_page: 'AsyncMainPage', invitee_page: 'AsyncMainPage',
+                     inviter: UserCreate, invitee: UserCreate) -> None:
+    """inviter отправляет приглашение, invitee его принимает"""
+    all_people_page = await inviter_page.go_to_all_people_page()
+    await all_people_page.send_invitation(invitee.username)
+    friends_page = await invitee_page.go_to_friends_page()
+    await friends_page.accept_request(inviter.username)
+
+
+async def add_friends_concurrently(pairs: Sequence[Tuple[UserCreate, UserCreate]]) -> None:
+    """Подружить все пары (кто приглашает, кого приглашают) одновременно.
+
+    Поднимает свой async Playwright и headless Chromium, настройки сессионного браузера
+    (--headed, фильтр ресурсов) сюда не попадают.
+    """
+    users = [user for pair in pairs for user in pair]
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch()
+        try:
+            async with login_concurrently(browser, users) as main_pages:
+                await asyncio.gather(*(
+                    add_friend(main_pages[2 * index], main_pages[2 * index + 1], inviter, invitee)
+                    for index, (inviter, invitee) in enumerate(pairs)
+                ))
+        finally:
+            await browser.close()
+
+
+@dataclass
+class AsyncBasePage:
+    """Асинхронный двойник BasePage: селекторы берутся у sync-страниц"""
+    page: Page
+
+    async def check_elements(self):
+        raise NotImplementedError('Метод не переопределён')
+
+    async def check_visible(self, required: Dict[str, str],
+                            lists: Dict[str, str | Tuple[str, int]] | None = None) -> None:
+        args = [required, lists or {}]
+        try:
+            await self.page.wait_for_function(ALL_ELEMENTS_VISIBLE_JS, arg=args)
+        except PlaywrightTimeoutError:
+            missing: List[str] = await self.page.evaluate(FIND_MISSING_ELEMENTS_JS, args)
+            raise AssertionError(f'Elements should be visible: {", ".join(missing)}')
+
+    async def wait_for_row(self, rows: Locator, text: str) -> Locator:
+        row = rows.filter(has=self.page.get_by_text(text, exact=True)).first
+        await expect(row).to_be_visible()
+        return row
+
+
+class AsyncLoginPage(AsyncBasePage):
+    @classmethod
+    async def open(cls, page: Page) -> 'AsyncLoginPage':
+        await page.goto(settings.AUTH_URL)
+        login_page = cls(page)
+        await login_page.check_elements()
+        return login_page
+
+    async def check_elements(self):
+        await self.check_visible({
+            "Username field": LoginPage.USERNAME_FIELD,
+            "Password field": LoginPage.PASSWORD_FIELD,
+            "Login button": LoginPage.LOGIN_BUTTON,
+            "Create account button": LoginPage.CREATE_ACCOUNT_BUTTON,
+        })
+
+    async def arrange_login(self, user: UserCreate) -> None:
+        await self.page.locator(LoginPage.USERNAME_FIELD).fill(user.username)
+        await self.page.locator(LoginPage.PASSWORD_FIELD).fill(user.password)
+        await self.page.locator(LoginPage.LOGIN_BUTTON).click()
+
+    async def login(self, user: UserCreate) -> 'AsyncMainPage':
+        await self.arrange_login(user)
+        await self.page.wait_for_url(re.compile('main'))
+        return AsyncMainPage(self.page)
+
+
+class AsyncMainPage(AsyncBasePage):
+    async def open_menu(self) -> None:
+        if not await self.page.locator(MainPage.PROFILE_MENU).is_visible():
+            await self.page.locator(MainPage.MENU_BUTTON).click()
+
+    async def get_menu_item(self, index: int) -> Locator:
+        await self.open_menu()
+        return self.page.locator(MainPage.PROFILE_MENU).locator(f'li:nth-child({index})')
+
+    async def go_to_friends_page(self) -> 'AsyncFriendsPage':
+        await (await self.get_menu_item(3)).click()
+        await self.page.wait_for_url(re.compile('people/friends'))
+        return await AsyncFriendsPage.open(self.page)
+
+    async def go_to_all_people_page(self) -> 'AsyncAllPeoplePage':
+        await (await self.get_menu_item(4)).click()
+        await self.page.wait_for_url(re.compile('people/all'))
+        return await AsyncAllPeoplePage.open(self.page)
+
+
+class AsyncAllPeoplePage(AsyncBasePage):
+    @classmethod
+    async def open(cls, page: Page) -> 'AsyncAllPeoplePage':
+        all_people_page = cls(page)
+        await all_people_page.check_elements()
+        return all_people_page
+
+    async def check_elements(self):
+        await self.check_visible({
+            "Search field": AllPeoplePage.SEARCH_FIELD,
+        }, {
+            "User": AllPeoplePage.PEOPLE_ROWS,
+        })
+
+    async def get_corresponding_user(self, username: str) -> Locator:
+        """Найти пользователя с username через поиск"""
+        async with self.page.expect_response(lambda response: '/api/v2/users/all' in response.url):
+            await self.page.locator(AllPeoplePage.SEARCH_FIELD).fill(username)
+            await self.page.keyboard.press('Enter')
+        return await self.wait_for_row(self.page.locator(AllPeoplePage.PEOPLE_ROWS), username)
+
+    async def send_invitation(self, username: str) -> None:
+        """Отправить приглашение в друзья пользователю с username"""
+        corresponding_user = await self.get_corresponding_user(username)
+        async with self.page.expect_response(lambda response: '/api/invitations/send' in response.url):
+            await corresponding_user.locator('button:has-text("Add friend")').click()
+        await expect(corresponding_user.locator('span:has-text("Waiting...")')).to_be_visible()
+
+
+class AsyncFriendsPage(AsyncBasePage):
+    @classmethod
+    async def open(cls, page: Page) -> 'AsyncFriendsPage':
+        friends_page = cls(page)
+        await friends_page.check_elements()
+        return friends_page
+
+    async def check_elements(self):
+        await self.check_visible({
+            "Search field": FriendsPage.SEARCH_FIELD,
+        }, {
+            "Request": FriendsPage.REQUEST_ROWS,
+            "Friend": FriendsPage.FRIEND_ROWS,
+        })
+
+    async def accept_request(self, username: str) -> None:
+        """Принять приглашение в друзья от username"""
+        request = await self.wait_for_row(self.page.locator(FriendsPage.REQUEST_ROWS), username)
+        async with self.page.expect_response(lambda response: '/api/invitations/accept' in response.url):
+            await request.locator('button:has-text("Accept")').click()
+        await self.wait_for_row(self.page.locator(FriendsPage.FRIEND_ROWS), username)
@@ -0,0 +1,141 @@
+import base64
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+from urllib.parse import urljoin
+
+from playwright.sync_api import Browser, BrowserContext, Page, Response
+
+from config import settings
+from models.user import UserCreate
+from .pages import LoginPage, MainPage
+
+
+# INFO: запас по времени, чтобы не отдавать токен, который истечёт посреди теста
+TOKEN_EXPIRY_MARGIN: int = 60
+MAIN_PAGE_MARKER: str = 'a[href="/spending"]'
+LOGIN_PAGE_MARKER: str = 'input[name="username"]'
+
+
+def get_main_url() -> str:
+    return urljoin(settings.FRONTEND_URL, 'main')
+
+
+def get_token_expiry(id_token: str) -> float | None:
+    """Получить время истечения (exp) из JWT без проверки подписи"""
+    try:
+        payload = id_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass
+class AuthState:
+    storage_state: dict
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    @property
+    def id_token(self) -> str | None:
+        """id_token, который фронтенд хранит в localStorage"""
+        for origin in self.storage_state.get('origins', []):
+            for item in origin.get('localStorage', []):
+                if item['name'] == 'id_token':
+                    return item['value']
+        return None
+
+    @classmethod
+    def from_storage_state(cls, storage_state: dict, ttl: int) -> 'AuthState':
+        state = cls(storage_state=storage_state, expires_at=time.time() + ttl)
+        token_expiry = get_token_expiry(state.id_token) if state.id_token else None
+        if token_expiry is not None:
+            state.expires_at = min(state.expires_at, token_expiry - TOKEN_EXPIRY_MARGIN)
+        return state
+
+
+class AuthStateCache:
+    """Кэш авторизованных storage state на всю сессию: логинимся через LoginPage один раз на пользователя"""
+    browser: Browser
+    ttl: int
+    on_new_context: Callable[[BrowserContext], None] | None
+    _states: Dict[str, AuthState]
+
+    def __init__(self, browser: Browser, ttl: int = settings.AUTH_STATE_TTL,
+                 on_new_context: Callable[[BrowserContext], None] | None = None):
+        self.browser = browser
+        self.ttl = ttl
+        self.on_new_context = on_new_context
+        self._states = {}
+
+    def get(self, user: UserCreate) -> AuthState:
+        """Получить storage state пользователя, залогинившись заново, если его нет или он истёк"""
+        state = self._states.get(user.username)
+        if state is None or state.expired:
+            state = self._login(user)
+        return state
+
+    def invalidate(self, username: str) -> None:
+        self._states.pop(username, None)
+
+    def new_context(self, user: UserCreate) -> BrowserContext:
+        """Создать контекст браузера, уже авторизованный под user"""
+        return self._new_context(storage_state=self.get(user).storage_state)
+
+    def open_main_page(self, context: BrowserContext, user: UserCreate) -> MainPage:
+        """Открыть /main в авторизованном контексте, при 401 или редиректе на логин обновить state"""
+        return self.open_main_pages([(context, user)])[0]
+
+    def open_main_pages(self, sessions: Sequence[Tuple[BrowserContext, UserCreate]]) -> List[MainPage]:
+        """Открыть /main сразу для нескольких пользователей: все навигации стартуют до ожидания первой,
+        поэтому страницы грузятся в браузере параллельно"""
+        opened: List[Tuple[Page, List[str], Callable[[Response], None]]] = []
+        for context, _ in sessions:
+            page = context.pages[0] if context.pages else context.new_page()
+            unauthorized: List[str] = []
+
+            def _on_response(response: Response, unauthorized: List[str] = unauthorized) -> None:
+                if response.status == 401:
+                    unauthorized.append(response.url)
+
+            page.on('response', _on_response)
+            page.goto(get_main_url(), wait_until='commit')
+            opened.append((page, unauthorized, _on_response))
+
+        main_pages: List[MainPage] = []
+        for (page, unauthorized, on_response), (_, user) in zip(opened, sessions):
+            page.locator(f'{MAIN_PAGE_MARKER}, {LOGIN_PAGE_MARKER}').first.wait_for()
+            page.remove_listener('response', on_response)
+            if unauthorized or not re.search('main', page.url):
+                print(f'Auth state for {user.username} is stale, logging in again')
+                self.invalidate(user.username)
+                main_pages.append(self._login_in_page(page, user))
+            else:
+                main_pages.append(MainPage(page))
+        return main_pages
+
+    def _login(self, user: UserCreate) -> AuthState:
+        context = self._new_context()
+        try:
+            self._login_in_page(context.new_page(), user)
+        finally:
+            context.close()
+        return self._states[user.username]
+
+    def _new_context(self, storage_state: dict | None = None) -> BrowserContext:
+        context = self.browser.new_context(storage_state=storage_state)
+        context.set_default_timeout(10000)
+        if self.on_new_context is not None:
+            self.on_new_context(context)
+        return context
+
+    def _login_in_page(self, page: Page, user: UserCreate) -> MainPage:
+        main_page = LoginPage(page).login(user)
+        self._states[user.username] = AuthState.from_storage_state(page.context.storage_state(), self.ttl)
+        return main_page
@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, TypeVar
+
+from playwright.sync_api import Browser
+
+from models.user import UserCreate
+
+T = TypeVar('T')
+
+
+@dataclass
+class SessionResources:
+    """Всё, что поднимается один раз на сессию (на воркер xdist)"""
+    browser: Browser
+    registered_user: UserCreate
+    friend_user: UserCreate
+
+
+@dataclass
+class BootstrapStep:
+    name: str
+    thread: str
+    started: float  # Секунды от начала bootstrap
+    finished: float
+
+    @property
+    def duration(self) -> float:
+        return self.finished - self.started
+
+
+class SessionBootstrap:
+    """Параллельный старт сессии: независимые шаги (прогрев БД, заведение пользователей) идут в пуле потоков,
+    а то, что обязано жить в главном потоке (sync Playwright), выполняется через run в это же время.
+    """
+    steps: List[BootstrapStep]
+    _started: float
+    _executor: ThreadPoolExecutor
+    _futures: List[Future]
+    _lock: threading.Lock
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.steps = []
+        self._started = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bootstrap')
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[..., T], *args) -> 'Future[T]':
+        """Запустить шаг в фоновом потоке"""
+        future = self._executor.submit(self._timed, name, func, *args)
+        self._futures.append(future)
+        return future
+
+    def run(self, name: str, func: Callable[..., T], *args) -> T:
+        """Выполнить шаг в текущем потоке, пока фоновые шаги идут параллельно"""
+        return self._timed(name, func, *args)
+
+    def wait(self) -> None:
+        """Дождаться всех фоновых шагов, первая ошибка пробрасывается дальше"""
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """Дождаться уже запущенных фоновых шагов (не начатые отменяются), ошибки не пробрасываются"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def timeline(self) -> str:
+        total = max((step.finished for step in self.steps), default=0.0)
+        serial = sum(step.duration for step in self.steps)
+        lines = [f'Session bootstrap took {total:.2f}s (steps one after another would take {serial:.2f}s):']
+        for step in sorted(self.steps, key=lambda step: step.started):
+            lines.append(
+                f'  {step.started:6.2f}s -> {step.finished:6.2f}s {step.duration:6.2f}s  {step.name} [{step.thread}]'
+            )
+        return '\n'.join(lines)
+
+    def _timed(self, name: str, func: Callable[..., T], *args) -> T:
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            step = BootstrapStep(
+                name=name,
+                thread=threading.current_thread().name,
+                started=started - self._started,
+                finished=time.perf_counter() - self._started,
+            )
+            with self._lock:
+                self.steps.append(step)
@@ -1,48 +1,131 @@
+import os
+import random
 import pytest
-from string import ascii_lowercase
 
-from playwright.sync_api import Playwright, Browser
+from playwright.sync_api import Playwright
 
 from .pages import *
+from .auth_state import AuthStateCache
+from .bootstrap import SessionBootstrap, SessionResources
+from .context_pool import ContextPool
+from .data_factory import DataFactory
+from .network import ResourceFilter
+from .timing import TimingPlugin, step_timer
 from models.user import UserCreate
-from services.user_service import user_service
+from services.auth_service import AuthService
+from services.base_service import dispose_engines, warm_up_engine
+from services.query_stats import query_recorder
+from services.gateway_service import GatewayService
+from services.provisioning_service import provisioning_service
+from services.snapshot_service import snapshot_service
+from services.spend_service import SpendService
+from services.user_pool import UserPool
+from services.user_service import UserService, user_service, USER_CHANGED_CHANNEL
+
+
+# Plugins
+
+def pytest_addoption(parser):
+    group = parser.getgroup('niffler-timing')
+    group.addoption('--timing', action='store_true', help='Time page object and DB service calls per test and phase')
+    group.addoption('--timing-report', default='timing_report.json', help='Path of the JSON timing report')
+    group.addoption('--timing-top', type=int, default=15, help='Number of slowest steps in the terminal summary')
+    parser.getgroup('niffler-data').addoption(
+        '--seed', type=int, default=settings.SEED, help='Seed of generated test data (NIFFLER_SEED), random by default'
+    )
+
+
+def get_seed(config) -> int:
+    """xdist workers take the seed chosen by the controller, so the whole run is reproducible from one seed"""
+    workerinput = getattr(config, 'workerinput', None)
+    if workerinput is not None and 'niffler_seed' in workerinput:
+        return workerinput['niffler_seed']
+    seed = config.getoption('--seed')
+    return seed if seed is not None else random.SystemRandom().randrange(2 ** 32)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput['niffler_seed'] = node.config.niffler_seed
+
+
+def pytest_report_header(config):
+    return f'niffler test data seed: {config.niffler_seed} (rerun with --seed {config.niffler_seed})'
+
+
+def pytest_configure(config):
+    config.niffler_seed = get_seed(config)
+    if not config.getoption('--timing', default=False):
+        return
+    step_timer.instrument([
+        LoginPage, RegistrationPage, MainPage, NewSpendingPage, EditSpendingPage, ProfilePage, FriendsPage,
+        AllPeoplePage, SpendService, UserService, AuthService,
+    ])
+    report_path = config.getoption('--timing-report')
+    worker_id = get_worker_id()
+    if worker_id != 'master':
+        report_path = report_path.replace('.json', f'_{worker_id}.json')
+    config.pluginmanager.register(TimingPlugin(step_timer, report_path, config.getoption('--timing-top')), 'niffler-timing')
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Count SQL statements issued by the test body and enforce @pytest.mark.query_budget"""
+    query_recorder.reset()
+    try:
+        result = yield
+    finally:
+        stats = query_recorder.reset()
+        repeated = stats.repeated()
+        item.user_properties.append(('sql', stats.summary()))
+        if repeated:
+            print(f'Repeated identical SQL statements (possible N+1) in {item.nodeid}:')
+            for statement, count in repeated:
+                print(f'  {count}x {statement}')
+
+    marker = item.get_closest_marker('query_budget')
+    if marker is not None:
+        max_queries = marker.kwargs.get('max_queries', marker.args[0] if marker.args else None)
+        max_repeats = marker.kwargs.get('max_repeats')
+        if max_queries is not None and stats.statements > max_queries:
+            raise AssertionError(f'Query budget exceeded: {stats.summary()}, budget is {max_queries} statements')
+        if max_repeats is not None and any(count > max_repeats for _, count in repeated):
+            raise AssertionError(f'Identical statement repeated more than {max_repeats} times: {repeated}')
+    return result
 
 
 # Mock data
 
+@pytest.fixture(scope='session')
+def data_factory(pytestconfig):
+    """Seeded generator of collision-free test data, scoped to the run and the xdist worker"""
+    factory = DataFactory(pytestconfig.niffler_seed, get_worker_id())
+    print(f'Test data seed {factory.seed}, name prefix {factory.prefix}')
+    yield factory
+
+
 @pytest.fixture
-def user():
+def user(data_factory):
     def _user(username_length: int = 10, password_length: int = 10):
-        user: UserCreate = UserCreate(
-            username=''.join(random.choice(ascii_lowercase) for _ in range(username_length)),
-            password=''.join(random.choice(ascii_lowercase) for _ in range(password_length))
-        )
-        return user
+        return data_factory.user(username_length, password_length)
 
     yield _user
 
 
 @pytest.fixture
-def category():
+def category(data_factory):
     """Get mock spend data"""
     def _category():
-        return ''.join([random.choice(ascii_lowercase) for _ in range(CATEGORY_NAME_LENGTH)])
+        return data_factory.category()
 
     yield _category
 
 
 @pytest.fixture
-def spend(category):
+def spend(data_factory):
     """Get mock spend data"""
     def _spend():
-        spend: SpendCreate = SpendCreate(
-            amount=round(random.uniform(MIN_AMOUNT, MAX_AMOUNT), 2),
-            currency=random.choice([currency.value['value'] for currency in list(CurrencyDict)]),
-            category=category(),
-            spend_date=get_random_date().strftime(SPEND_CREATE_DATE_FORMAT),
-            description=''.join([random.choice(ascii_lowercase) for _ in range(CATEGORY_NAME_LENGTH)]),
-        )
-        return spend
+        return data_factory.spend()
 
     yield _spend
 
@@ -50,60 +133,165 @@ def spend(category):
 # Base fixtures
 
 @pytest.fixture(scope='session', autouse=True)
-def browser(playwright: Playwright):
-    browser = playwright.chromium.launch()
-    yield browser
-    browser.close()
+def db_engines():
+    """DB engines are created lazily by services, dispose all their pools at session end"""
+    yield
+    dispose_engines()
+
+
+@pytest.fixture(scope='session', autouse=True)
+def session_bootstrap(playwright: Playwright, db_engines, data_factory):
+    """Start the session concurrently: DB warm-up and session users provisioning run in a thread pool
+    while Chromium is launched in the main thread (sync Playwright is bound to it)"""
+    registered_user = UserCreate(username=get_worker_username(settings.REGISTERED_USERNAME, data_factory),
+                                 password='pAsSwOrD')
+    friend_user = UserCreate(username=get_worker_username(settings.FRIEND_USERNAME, data_factory),
+                             password='pAsSwOrD')
+    bootstrap = SessionBootstrap()
+    for db_url in {settings.AUTH_DB_URL, settings.USERDATA_DB_URL, settings.SPEND_DB_URL} - {None}:
+        bootstrap.submit(f'warm up {db_url.rsplit("/", 1)[-1]} DB', warm_up_engine, db_url)
+    notify_trigger = None
+    if settings.DB_NOTIFY:
+        notify_trigger = bootstrap.submit(
+            'install notify trigger', user_service.install_notify_trigger, 'user', USER_CHANGED_CHANNEL
+        )
+    # INFO: provisioned directly in auth and userdata databases, no browser registration
+    bootstrap.submit('provision session users', provisioning_service.provision_users, [registered_user, friend_user])
+    browser = None
+    try:
+        browser = bootstrap.run('launch browser', playwright.chromium.launch)
+        bootstrap.wait()
+        print(bootstrap.timeline())
+
+        yield SessionResources(browser, registered_user, friend_user)
+    finally:
+        # Background steps may still be running if the bootstrap failed, let them finish before cleanup
+        bootstrap.shutdown()
+        if browser is not None:
+            browser.close()
+        # Delete session users with related entities, also after a partially failed bootstrap
+        print('Remove registered user and user friend')
+        provisioning_service.deprovision_users([registered_user.username, friend_user.username])
+        if notify_trigger is not None and not notify_trigger.cancelled() and notify_trigger.exception() is None:
+            # Drop the test trigger from the app database
+            notify_trigger.result()()
+
+
+@pytest.fixture(scope='session')
+def browser(session_bootstrap):
+    yield session_bootstrap.browser
+
+
+@pytest.fixture(scope='session')
+def resource_filter():
+    """Opt-in network filtering profile (NIFFLER_BLOCK_RESOURCES), None when disabled"""
+    resource_filter = ResourceFilter.from_settings()
+    yield resource_filter
+    if resource_filter is not None:
+        print(resource_filter.summary())
 
 
 @pytest.fixture
-def page(browser):
-    page = browser.new_page()
-    page.set_default_timeout(10000)
+def page(context_pool):
+    context = context_pool.lease()
+    page = context.new_page()
     yield page
-    page.close()
+    context_pool.release(context)
+
+
+@pytest.fixture(scope='session')
+def auth_states(browser, resource_filter):
+    """Session-level cache of authenticated storage states, one login per user"""
+    yield AuthStateCache(browser, on_new_context=resource_filter.attach if resource_filter else None)
+
+
+@pytest.fixture(scope='session')
+def context_pool(browser, auth_states, resource_filter):
+    """Browser contexts that tests lease and return after a cheap reset (opt-in via NIFFLER_CONTEXT_POOL_SIZE),
+    with the default size 0 every lease is a fresh context"""
+    # INFO: routing disables the HTTP cache of a context, so with the resource filter there is nothing to warm up
+    pool = ContextPool(browser, auth_states, on_new_context=resource_filter.attach if resource_filter else None,
+                       warm_up_cache=resource_filter is None)
+    pool.warm_up()
+    yield pool
+    pool.close()
+
+
+def get_worker_id() -> str:
+    """Id of the current pytest-xdist worker (gw0, gw1, ...) or 'master' for a serial run"""
+    return os.getenv('PYTEST_XDIST_WORKER', 'master')
 
 
-def register_user(browser: Browser, user_to_register: UserCreate) -> None:
-    """Зарегистрировать юзера для использования в фикстуре"""
-    """Create a single registered user for all operations except registration test"""
-    page = browser.new_page()
-    page.goto(settings.REGISTRATION_URL)
-    page.locator('#username').fill(user_to_register.username)
-    page.locator('#password').fill(user_to_register.password)
-    page.locator('#passwordSubmit').fill(user_to_register.password)
-    page.locator('button[type="submit"]').click()
+def get_worker_username(base_username: str | None, data_factory: DataFactory) -> str:
+    """Имя пользователя, уникальное для текущего воркера: каждый воркер работает со своими юзерами"""
+    if not base_username:
+        return data_factory.unique_name(10)
+    worker_id = get_worker_id()
+    return base_username if worker_id == 'master' else f'{base_username}_{worker_id}'
 
 
 # Advanced fixtures and also page fixtures
-@pytest.fixture(scope='session', autouse=True)
-def registered_user(browser):
-    """Create a single registered user for all operations except registration test"""
-    user_to_register: UserCreate = UserCreate(
-        username=settings.REGISTERED_USERNAME,
-        password='pAsSwOrD'
-    )
-    register_user(browser, user_to_register)
+@pytest.fixture(scope='session')
+def registered_user(session_bootstrap):
+    """A single registered user (per xdist worker) for all operations except registration test"""
+    yield session_bootstrap.registered_user
 
-    yield user_to_register
-    # Delete this user with related entities
-    print(f'Remove registered user')
-    user_service.delete_user(user_to_register.username)
 
+@pytest.fixture(scope='session')
+def friend_user(session_bootstrap):
+    """A single friend user (per xdist worker) for operations with friends"""
+    yield session_bootstrap.friend_user
+
+
+@pytest.fixture(scope='session')
+def gateway(auth_states, registered_user):
+    """API arrange layer: one gateway client per user, reusing the cached id_token"""
+    clients: dict[str, GatewayService] = {}
+
+    def _gateway(user: UserCreate = registered_user) -> GatewayService:
+        if user.username not in clients:
+            def _token(refresh: bool) -> str:
+                if refresh:
+                    auth_states.invalidate(user.username)
+                return auth_states.get(user).id_token
+
+            clients[user.username] = GatewayService(user.username, _token)
+        return clients[user.username]
+
+    yield _gateway
 
-@pytest.fixture(scope='session', autouse=True)
-def friend_user(browser):
-    """Create a single friend user for operations with friends"""
-    friend_user: UserCreate = UserCreate(
-        username=settings.FRIEND_USERNAME,
-        password='pAsSwOrD'
-    )
-    register_user(browser, friend_user)
 
-    yield friend_user
-    # Delete this user with related entities
-    print(f'Remove user friend')
-    user_service.delete_user(friend_user.username)
+@pytest.fixture(autouse=True)
+def db_snapshot(registered_user, friend_user):
+    """Snapshot session users' data before each test and restore it afterwards, even if the test failed"""
+    snapshot = snapshot_service.take([registered_user.username, friend_user.username])
+    yield snapshot
+    snapshot_service.restore(snapshot)
+
+
+@pytest.fixture(scope='session')
+def user_pool(data_factory):
+    """Users provisioned in bulk up front and leased to tests, the whole pool is deleted at the end"""
+    pool = UserPool(settings.USER_POOL_SIZE, prefix=f'pool{data_factory.prefix}_')
+    pool.provision()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def pooled_user(user_pool):
+    """Lease clean users from the pool, they are reset and returned after the test"""
+    leased: list[UserCreate] = []
+
+    def _pooled_user() -> UserCreate:
+        # INFO: the lease may grow the pool, those queries are not part of the test's query budget
+        with query_recorder.paused():
+            user = user_pool.lease()
+        leased.append(user)
+        return user
+
+    yield _pooled_user
+    user_pool.release(leased)
 
 
 @pytest.fixture
@@ -123,12 +311,18 @@ def registration_page(page):
 
 
 @pytest.fixture
-def main_page(login_page, registered_user):
-    def _main_page() -> MainPage:
-        new_login_page = login_page()
-        return new_login_page.login(registered_user)
+def main_page(auth_states, context_pool, registered_user):
+    contexts = []
+
+    def _main_page(user: UserCreate = registered_user) -> MainPage:
+        # INFO: open /main in a warm context authenticated from the cached storage state, no LoginPage round-trip
+        context = context_pool.lease(user)
+        contexts.append(context)
+        return auth_states.open_main_page(context, user)
 
     yield _main_page
+    for context in contexts:
+        context_pool.release(context)
 
 
 @pytest.fixture
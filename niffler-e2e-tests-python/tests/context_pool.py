@@ -0,0 +1,149 @@
+from typing import Callable, Dict, List
+
+from playwright.sync_api import Browser, BrowserContext, Page
+
+from config import settings
+from models.user import UserCreate
+from .auth_state import AuthStateCache
+from .network import get_origin
+
+
+# INFO: fake same-origin url, fulfilled locally, to get access to an origin's localStorage without loading the app
+STORAGE_PAGE_PATH: str = '/__niffler_storage__'
+RESET_POLICIES = ('clear', 'keep_auth', 'recreate')
+
+
+class ContextPool:
+    """Пул прогретых контекстов браузера: бандл фронтенда уже лежит в HTTP кэше контекста.
+
+    Тест берёт контекст через lease (опционально уже авторизованный) и возвращает через release,
+    после чего контекст сбрасывается по reset_policy:
+    - clear: закрыть страницы, очистить cookies и localStorage, HTTP кэш остаётся;
+    - keep_auth: закрыть страницы, авторизация остаётся для следующего lease того же пользователя;
+    - recreate: закрыть контекст и создать новый прогретый.
+
+    Playwright выключает HTTP кэш в контексте, где включён route (например, ResourceFilter), поэтому
+    с warm_up_cache=False контексты не прогреваются: пул тогда экономит только создание контекста.
+    Пул меняет изоляцию тестов (контекст переиспользуется), поэтому включается явно через NIFFLER_CONTEXT_POOL_SIZE.
+    С size 0 пула нет: lease каждый раз создаёт новый контекст (авторизованный сразу из storage state),
+    release его закрывает.
+    """
+    browser: Browser
+    size: int
+    reset_policy: str
+    warm_up_cache: bool
+    auth_states: AuthStateCache
+    on_new_context: Callable[[BrowserContext], None] | None
+    _idle: List[BrowserContext]
+    _owners: Dict[BrowserContext, str | None]  # Контекст -> под кем он сейчас авторизован
+
+    def __init__(self, browser: Browser, auth_states: AuthStateCache, size: int = settings.CONTEXT_POOL_SIZE,
+                 reset_policy: str = settings.CONTEXT_RESET_POLICY,
+                 on_new_context: Callable[[BrowserContext], None] | None = None, warm_up_cache: bool = True):
+        if reset_policy not in RESET_POLICIES:
+            raise ValueError(f'Unknown context reset policy {reset_policy}, expected one of {RESET_POLICIES}')
+        self.browser = browser
+        self.auth_states = auth_states
+        self.size = size
+        self.reset_policy = reset_policy
+        self.on_new_context = on_new_context
+        self.warm_up_cache = warm_up_cache
+        self._idle = []
+        self._owners = {}
+
+    def warm_up(self) -> None:
+        """Заранее создать и прогреть size контекстов"""
+        while len(self._idle) < self.size:
+            self._idle.append(self._create_context())
+
+    def lease(self, user: UserCreate | None = None) -> BrowserContext:
+        """Взять контекст из пула; если передан user, контекст будет авторизован под ним"""
+        username = user.username if user is not None else None
+        if self.size == 0:
+            context = self.auth_states.new_context(user) if user is not None else self._new_context()
+            self._owners[context] = username
+            return context
+        context = next((idle for idle in self._idle if self._owners[idle] == username), None)
+        if context is None and self._idle:
+            context = self._idle[0]
+        if context is None:
+            context = self._create_context()
+        else:
+            self._idle.remove(context)
+
+        if self._owners[context] != username:
+            self._clear_auth(context)
+            if user is not None:
+                self._apply_auth(context, user)
+        return context
+
+    def release(self, context: BrowserContext) -> None:
+        """Вернуть контекст в пул со сбросом состояния по reset_policy"""
+        for page in context.pages:
+            page.close()
+        if len(self._idle) >= self.size or self.reset_policy == 'recreate':
+            self._close_context(context)
+            if len(self._idle) < self.size:
+                self._idle.append(self._create_context())
+            return
+        if self.reset_policy == 'clear':
+            self._clear_auth(context)
+        self._idle.append(context)
+
+    def close(self) -> None:
+        for context in list(self._owners):
+            self._close_context(context)
+        self._idle.clear()
+
+    def _new_context(self) -> BrowserContext:
+        context = self.browser.new_context()
+        context.set_default_timeout(10000)
+        if self.on_new_context is not None:
+            self.on_new_context(context)
+        return context
+
+    def _create_context(self) -> BrowserContext:
+        context = self._new_context()
+        if self.warm_up_cache:
+            # Warm up: load the frontend once so its bundle lands in this context's HTTP cache
+            page = context.new_page()
+            page.goto(settings.FRONTEND_URL)
+            page.wait_for_load_state('load')
+            page.close()
+        self._owners[context] = None
+        self._clear_auth(context)
+        return context
+
+    def _close_context(self, context: BrowserContext) -> None:
+        self._owners.pop(context, None)
+        context.close()
+
+    def _apply_auth(self, context: BrowserContext, user: UserCreate) -> None:
+        storage_state = self.auth_states.get(user).storage_state
+        context.add_cookies(storage_state.get('cookies', []))
+        for origin in storage_state.get('origins', []):
+            self._run_on_origin(
+                context, origin['origin'],
+                'items => items.forEach(item => localStorage.setItem(item.name, item.value))',
+                origin.get('localStorage', [])
+            )
+        self._owners[context] = user.username
+
+    def _clear_auth(self, context: BrowserContext) -> None:
+        context.clear_cookies()
+        origins = {origin['origin'] for origin in context.storage_state().get('origins', [])}
+        for origin in origins:
+            self._run_on_origin(context, origin, '() => localStorage.clear()')
+        self._owners[context] = None
+
+    @staticmethod
+    def _run_on_origin(context: BrowserContext, origin: str, script: str, arg=None) -> None:
+        """Выполнить script в контексте origin, не загружая само приложение"""
+        url = f'{get_origin(origin)}{STORAGE_PAGE_PATH}'
+        page: Page = context.new_page()
+        try:
+            page.route(url, lambda route: route.fulfill(status=200, content_type='text/html', body='<html></html>'))
+            page.goto(url)
+            page.evaluate(script, arg)
+        finally:
+            page.close()
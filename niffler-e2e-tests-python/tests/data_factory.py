@@ -0,0 +1,108 @@
+import hashlib
+import random
+from datetime import timedelta
+from itertools import count
+from string import ascii_lowercase, digits
+from typing import Iterator, List
+
+from config import (
+    CurrencyDict, CATEGORY_NAME_LENGTH, MAX_AMOUNT, MAX_DATE, MIN_AMOUNT, MIN_DATE,
+    SPEND_CREATE_DATE_FORMAT,
+)
+from models.spend import SpendCreate
+from models.user import UserCreate
+
+
+BASE36_ALPHABET: str = digits + ascii_lowercase
+# INFO: run token length, the run token is a hash of the seed: 36 ** 4 (~1.7M) distinct tokens
+RUN_TOKEN_LENGTH: int = 4
+# INFO: fixed width, so the worker index never runs into the counter: 36 ** 2 workers
+WORKER_INDEX_LENGTH: int = 2
+
+
+def to_base36(number: int) -> str:
+    result = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        result = BASE36_ALPHABET[remainder] + result
+        if number == 0:
+            return result
+
+
+def get_worker_index(worker_id: str) -> int:
+    """gw0 -> 1, gw1 -> 2, ..., master -> 0"""
+    return int(worker_id[2:]) + 1 if worker_id.startswith('gw') else 0
+
+
+class DataFactory:
+    """Генератор тестовых данных, воспроизводимый по seed.
+
+    Уникальные имена (пользователи, категории) собираются как
+    <токен прогона><воркер><счётчик><случайный хвост до нужной длины>: токен и воркер фиксированной ширины,
+    счётчик из цифр, хвост из букв, поэтому имя однозначно разбирается обратно и имена не пересекаются
+    ни между воркерами xdist, ни внутри прогона. Токен прогона - хэш seed, так что с прогоном с другим seed
+    имена совпадают лишь при совпадении токенов (маловероятно, но возможно; важно только если тот прогон
+    не удалил свои данные).
+    Каждый воркер получает свой поток случайных чисел, производный от общего seed.
+    """
+    seed: int
+    worker_id: str
+    prefix: str
+    _random: random.Random
+    _counter: Iterator[int]
+
+    def __init__(self, seed: int, worker_id: str = 'master') -> None:
+        self.seed = seed
+        self.worker_id = worker_id
+        self._random = random.Random(f'{seed}:{worker_id}')
+        seed_hash = int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:8], 'big')
+        run_token = to_base36(seed_hash % 36 ** RUN_TOKEN_LENGTH).rjust(RUN_TOKEN_LENGTH, '0')
+        self.prefix = f'{run_token}{to_base36(get_worker_index(worker_id)).rjust(WORKER_INDEX_LENGTH, "0")}'
+        self._counter = count()
+
+    def random_string(self, length: int) -> str:
+        return ''.join(self._random.choices(ascii_lowercase, k=length))
+
+    def unique_name(self, length: int) -> str:
+        """Unique name of the given length; the name may be longer if the unique part does not fit.
+
+        A length too short even for the prefix means deliberately invalid data (e.g. a 2-letter username),
+        such names are just random.
+        """
+        if length <= len(self.prefix):
+            return self.random_string(length)
+        # The counter is decimal and the tail has no digits, so the counter always ends where the tail starts
+        name = f'{self.prefix}{next(self._counter)}'
+        return name + self.random_string(length - len(name))
+
+    def user(self, username_length: int = 10, password_length: int = 10) -> UserCreate:
+        return UserCreate(username=self.unique_name(username_length), password=self.random_string(password_length))
+
+    def users(self, amount: int, username_length: int = 10, password_length: int = 10) -> List[UserCreate]:
+        return [self.user(username_length, password_length) for _ in range(amount)]
+
+    def category(self) -> str:
+        return self.unique_name(CATEGORY_NAME_LENGTH)
+
+    def categories(self, amount: int) -> List[str]:
+        return [self.category() for _ in range(amount)]
+
+    def spend_date(self) -> str:
+        delta_days = self._random.randint(0, (MAX_DATE - MIN_DATE).days)
+        return (MIN_DATE + timedelta(days=delta_days)).strftime(SPEND_CREATE_DATE_FORMAT)
+
+    def spend(self, category: str | None = None) -> SpendCreate:
+        return SpendCreate(
+            amount=round(self._random.uniform(MIN_AMOUNT, MAX_AMOUNT), 2),
+            currency=self._random.choice([currency.value['value'] for currency in CurrencyDict]),
+            category=category or self.category(),
+            spend_date=self.spend_date(),
+            description=self.random_string(CATEGORY_NAME_LENGTH),
+        )
+
+    def spends(self, amount: int, categories: List[str] | None = None) -> List[SpendCreate]:
+        """Batch of spends, spread over given categories or each in its own new category"""
+        return [
+            self.spend(self._random.choice(categories) if categories else None)
+            for _ in range(amount)
+        ]
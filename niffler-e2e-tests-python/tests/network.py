@@ -0,0 +1,69 @@
+import base64
+from collections import Counter
+from typing import Iterable, Set
+from urllib.parse import urlsplit
+
+from playwright.sync_api import BrowserContext, Page, Request, Route
+
+from config import settings
+
+
+# INFO: 1x1 transparent gif, served instead of blocked images so the layout does not break
+EMPTY_GIF: bytes = base64.b64decode('R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7')
+# INFO: never blocked, the app does not work without them
+ESSENTIAL_RESOURCE_TYPES: Set[str] = {'document', 'script', 'stylesheet', 'xhr', 'fetch', 'websocket'}
+
+
+def get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+class ResourceFilter:
+    """Профиль роутинга для тестового браузера: отсекает картинки, шрифты, медиа и сторонние домены"""
+    resource_types: Set[str]
+    blocked_origins: Set[str]
+    blocked_requests: Counter  # resource type -> число заблокированных запросов
+    blocked_origin_requests: Counter  # origin -> число заблокированных запросов
+
+    def __init__(self, resource_types: Iterable[str], blocked_origins: Iterable[str] = ()) -> None:
+        self.resource_types = set(resource_types) - ESSENTIAL_RESOURCE_TYPES
+        self.blocked_origins = {get_origin(origin) for origin in blocked_origins}
+        self.blocked_requests = Counter()
+        self.blocked_origin_requests = Counter()
+
+    @classmethod
+    def from_settings(cls) -> 'ResourceFilter | None':
+        """Фильтр по настройкам или None, если он выключен (включается через NIFFLER_BLOCK_RESOURCES)"""
+        if not settings.BLOCK_RESOURCES:
+            return None
+        return cls(settings.BLOCKED_RESOURCE_TYPES, settings.BLOCKED_ORIGINS)
+
+    def attach(self, target: BrowserContext | Page) -> None:
+        target.route('**/*', self._handle)
+
+    def is_blocked(self, request: Request) -> bool:
+        if request.resource_type in ESSENTIAL_RESOURCE_TYPES:
+            return False
+        return request.resource_type in self.resource_types or get_origin(request.url) in self.blocked_origins
+
+    def _handle(self, route: Route) -> None:
+        request = route.request
+        if not self.is_blocked(request):
+            route.continue_()
+            return
+        self.blocked_requests[request.resource_type] += 1
+        self.blocked_origin_requests[get_origin(request.url)] += 1
+        if request.resource_type == 'image':
+            route.fulfill(status=200, content_type='image/gif', body=EMPTY_GIF)
+        else:
+            route.abort('blockedbyclient')
+
+    @property
+    def total_blocked(self) -> int:
+        return sum(self.blocked_requests.values())
+
+    def summary(self) -> str:
+        by_type = ', '.join(f'{resource_type}: {count}' for resource_type, count in self.blocked_requests.most_common())
+        by_origin = ', '.join(f'{origin}: {count}' for origin, count in self.blocked_origin_requests.most_common(5))
+        return f'Blocked {self.total_blocked} requests ({by_type or "none"}); top origins: {by_origin or "none"}'
@@ -1,13 +1,51 @@
 import re
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Tuple
 
-from playwright.sync_api import Page, Locator, expect
+from playwright.sync_api import Page, Locator, TimeoutError as PlaywrightTimeoutError, expect
 from config import *
 from models.user import UserCreate
 from models.spend import SpendListed, SpendCreate
 
 
+# INFO: reads every spend row in one evaluation: list of rows, each row is a list of cell texts
+SPEND_ROWS_JS = '''rows => rows.map(row => Array.from(row.querySelectorAll('td'), td => {
+    const span = td.querySelector('span');
+    return span ? span.textContent : '';
+}))'''
+
+# INFO: category name per profile row (None for rows without a name element), the name selector is passed as arg
+CATEGORY_NAMES_JS = '''(rows, nameSelector) => rows.map(row => {
+    const name = row.querySelector(nameSelector);
+    return name ? name.textContent : null;
+})'''
+
+# INFO: names of required elements that are absent or hidden (every match is checked), and of list rows that are hidden.
+# A list is either a selector or [selector, number of leading rows to skip] (e.g. table headers)
+FIND_MISSING_ELEMENTS_JS = '''([required, lists]) => {
+    const isVisible = element => {
+        const rect = element.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(element).visibility !== 'hidden';
+    };
+    const missing = [];
+    for (const [name, selector] of Object.entries(required)) {
+        const elements = Array.from(document.querySelectorAll(selector));
+        if (elements.length === 0) missing.push(name);
+        elements.forEach((element, index) => {
+            if (!isVisible(element)) missing.push(elements.length > 1 ? `${name} #${index}` : name);
+        });
+    }
+    for (const [name, list] of Object.entries(lists)) {
+        const [selector, skip] = Array.isArray(list) ? list : [list, 0];
+        Array.from(document.querySelectorAll(selector)).slice(skip).forEach((element, index) => {
+            if (!isVisible(element)) missing.push(`${name} #${index}`);
+        });
+    }
+    return missing;
+}'''
+ALL_ELEMENTS_VISIBLE_JS = f'args => ({FIND_MISSING_ELEMENTS_JS})(args).length === 0'
+
+
 @dataclass
 class BasePage:
     page: Page
@@ -15,8 +53,47 @@ class BasePage:
     def check_elements(self):
         raise NotImplementedError('Метод не переопределён')
 
+    def check_visible(self, required: Dict[str, str],
+                      lists: Dict[str, str | Tuple[str, int]] | None = None) -> None:
+        """Проверить видимость всех элементов одним ожиданием в браузере.
+
+        required: имя -> CSS селектор, должен найтись хотя бы один элемент и все найденные должны быть видны;
+        lists: имя -> CSS селектор строк списка (или (селектор, сколько первых строк пропустить)),
+        каждая найденная строка должна быть видна (список может быть пуст).
+        При таймауте падает с перечислением всех невидимых элементов сразу.
+        """
+        args = [required, lists or {}]
+        try:
+            self.page.wait_for_function(ALL_ELEMENTS_VISIBLE_JS, arg=args)
+        except PlaywrightTimeoutError:
+            missing: List[str] = self.page.evaluate(FIND_MISSING_ELEMENTS_JS, args)
+            raise AssertionError(f'Elements should be visible: {", ".join(missing)}')
+
+    # INFO: wait subsystem - wait for the app itself instead of fixed sleeps
+
+    def expect_api_response(self, path: str, method: str = 'GET'):
+        """Контекстный менеджер: действие внутри него завершится, когда gateway ответит на path"""
+        return self.page.expect_response(
+            lambda response: path in response.url and response.request.method == method
+        )
+
+    def wait_for_row_count(self, rows: Locator, count: int) -> None:
+        """Дождаться, пока в таблице будет ровно count строк"""
+        expect(rows).to_have_count(count)
+
+    def wait_for_row(self, rows: Locator, text: str) -> Locator:
+        """Дождаться строки таблицы, в которой есть элемент с точным текстом text"""
+        row = rows.filter(has=self.page.get_by_text(text, exact=True))
+        expect(row.first).to_be_visible()
+        return row.first
+
 
 class LoginPage(BasePage):
+    USERNAME_FIELD = 'input[name="username"]'
+    PASSWORD_FIELD = 'input[name="password"]'
+    LOGIN_BUTTON = 'button[type="submit"]'
+    CREATE_ACCOUNT_BUTTON = 'a[href="/register"]'
+
     username_field: Locator
     password_field: Locator
     login_button: Locator
@@ -26,23 +103,20 @@ class LoginPage(BasePage):
         super().__init__(page)
         self.page.goto(settings.AUTH_URL)
 
-        self.username_field = self.page.locator('input[name="username"]')
-        self.password_field = self.page.locator('input[name="password"]')
-        self.login_button = self.page.locator('button[type="submit"]')
-        self.create_account_button = self.page.locator('a[href="/register"]')
+        self.username_field = self.page.locator(self.USERNAME_FIELD)
+        self.password_field = self.page.locator(self.PASSWORD_FIELD)
+        self.login_button = self.page.locator(self.LOGIN_BUTTON)
+        self.create_account_button = self.page.locator(self.CREATE_ACCOUNT_BUTTON)
 
         self.check_elements()
 
     def check_elements(self):
-        elements = [
-            (self.username_field, "Username field"),
-            (self.password_field, "Password field"),
-            (self.login_button, "Login button"),
-            (self.create_account_button, "Create account button")
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Username field": self.USERNAME_FIELD,
+            "Password field": self.PASSWORD_FIELD,
+            "Login button": self.LOGIN_BUTTON,
+            "Create account button": self.CREATE_ACCOUNT_BUTTON,
+        })
 
     def arrange_login(self, user: UserCreate) -> None:
         """Prepare to log in without expect"""
@@ -57,6 +131,11 @@ class LoginPage(BasePage):
 
 
 class RegistrationPage(BasePage):
+    USERNAME_FIELD = '#username'
+    PASSWORD_FIELD = '#password'
+    CONFIRM_PASSWORD_FIELD = '#passwordSubmit'
+    SIGNUP_BUTTON = 'button[type="submit"]'
+
     username_field: Locator
     password_field: Locator
     confirm_password_field: Locator
@@ -66,23 +145,20 @@ class RegistrationPage(BasePage):
         super().__init__(page)
         self.page.goto(settings.REGISTRATION_URL)
 
-        self.username_field = self.page.locator('#username')
-        self.password_field = self.page.locator('#password')
-        self.confirm_password_field = self.page.locator('#passwordSubmit')
-        self.signup_button = self.page.locator('button[type="submit"]')
+        self.username_field = self.page.locator(self.USERNAME_FIELD)
+        self.password_field = self.page.locator(self.PASSWORD_FIELD)
+        self.confirm_password_field = self.page.locator(self.CONFIRM_PASSWORD_FIELD)
+        self.signup_button = self.page.locator(self.SIGNUP_BUTTON)
 
         self.check_elements()
 
     def check_elements(self):
-        elements = [
-            (self.username_field, "Username field"),
-            (self.password_field, "Password field"),
-            (self.confirm_password_field, "Confirm password field"),
-            (self.signup_button, "Signup button")
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Username field": self.USERNAME_FIELD,
+            "Password field": self.PASSWORD_FIELD,
+            "Confirm password field": self.CONFIRM_PASSWORD_FIELD,
+            "Signup button": self.SIGNUP_BUTTON,
+        })
 
     @property
     def signin_button(self) -> Locator:
@@ -96,6 +172,13 @@ class RegistrationPage(BasePage):
 
 
 class MainPage(BasePage):
+    NEW_SPENDING_BUTTON = 'a[href="/spending"]'
+    MENU_BUTTON = 'button[aria-label="Menu"]'
+    SEARCH_FIELD = 'input[aria-label="search"]'
+    DELETE_BUTTON = '#delete'
+    SPEND_ROWS = 'table tbody tr[role="checkbox"]'
+    PROFILE_MENU = 'ul[role="menu"]'
+
     new_spending_button: Locator  # Кнопка новой траты
     menu_button: Locator  # Кнопка меню с аватарой
     search_field: Locator  # Поле поиска по тратам
@@ -108,28 +191,37 @@ class MainPage(BasePage):
     def __init__(self, page: Page):
         super().__init__(page)
 
-        self.new_spending_button = self.page.locator('a[href="/spending"]')
-        self.menu_button = self.page.locator('button[aria-label="Menu"]')
-        self.search_field = self.page.locator('input[aria-label="search"]')
-        self.profile_menu = self.page.locator('ul[role="menu"]')
+        self.new_spending_button = self.page.locator(self.NEW_SPENDING_BUTTON)
+        self.menu_button = self.page.locator(self.MENU_BUTTON)
+        self.search_field = self.page.locator(self.SEARCH_FIELD)
+        self.profile_menu = self.page.locator(self.PROFILE_MENU)
 
-    def get_nth_spend(self, index: int) -> SpendListed:
-        nth_spend_cells: List[Locator] = self.get_spend_cells(index)
-        amount, currency_str = nth_spend_cells[2].locator('span').text_content().strip().split(' ')
-        currency = next(cur for cur in list(CurrencyDict) if cur.value['sign'] == currency_str)
+    def get_spends(self) -> List[SpendListed]:
+        """Прочитать всю таблицу трат за один round trip в браузер"""
+        rows: List[List[str]] = self.spend_rows.evaluate_all(SPEND_ROWS_JS)
+        return [self.to_spend_listed(cells) for cells in rows]
+
+    @staticmethod
+    def to_spend_listed(cells: List[str]) -> SpendListed:
+        amount, currency_sign = cells[2].strip().split(' ')
         return SpendListed(
             amount=float(amount),
-            currency=currency.value['value'],
-            category=nth_spend_cells[1].locator('span').text_content(),
-            spend_date=nth_spend_cells[4].locator('span').text_content(),
-            description=nth_spend_cells[3].locator('span').text_content()
+            currency=CURRENCY_BY_SIGN[currency_sign],
+            category=cells[1],
+            spend_date=cells[4],
+            description=cells[3]
         )
 
+    def get_nth_spend(self, index: int) -> SpendListed:
+        spends: List[SpendListed] = self.get_spends()
+        if not 0 <= index < len(spends):
+            raise AssertionError(f'Указан некорректный индекс траты в списке трат: {index}')
+        return spends[index]
+
     def get_spend_cells(self, index: int) -> List[Locator]:
-        if len(self.spend_list) <= index < 0:
+        if not 0 <= index < self.spend_count:
             raise AssertionError(f'Указан некорректный индекс траты в списке трат: {index}')
-        nth_spend: Locator = self.spend_list[index]
-        return nth_spend.locator('td').all()
+        return self.spend_rows.nth(index).locator('td').all()
 
     def select_spend_in_list(self, index: int) -> None:
         spend_cells = self.get_spend_cells(index)
@@ -142,22 +234,20 @@ class MainPage(BasePage):
         return EditSpendingPage(self.page)
 
     def check_elements(self):
-        elements = [
-            (self.new_spending_button, "New spending button"),
-            (self.menu_button, "Menu button"),
-            (self.search_field, "Search field"),
-            (self.delete_button, "Delete button"),
-            *[(spend, "Spend") for spend in self.spend_list],
-            (self.profile_menu, "Profile menu"),
-            (self.profile_tab, "Profile tab"),
-            (self.friends_tab, "Friends tab"),
-            (self.all_people_tab, "All people tab"),
-            (self.sign_out_tab, "Sign out tab"),
-            (self.log_out_button, "Log out button"),
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.open_menu()
+        self.check_visible({
+            "New spending button": self.NEW_SPENDING_BUTTON,
+            "Menu button": self.MENU_BUTTON,
+            "Search field": self.SEARCH_FIELD,
+            "Delete button": self.DELETE_BUTTON,
+            "Profile menu": self.PROFILE_MENU,
+            "Profile tab": f'{self.PROFILE_MENU} li:nth-child(1)',
+            "Friends tab": f'{self.PROFILE_MENU} li:nth-child(3)',
+            "All people tab": f'{self.PROFILE_MENU} li:nth-child(4)',
+            "Sign out tab": f'{self.PROFILE_MENU} li:nth-child(6)',
+        }, {
+            "Spend": self.SPEND_ROWS,
+        })
 
     def go_to_new_spending_page(self) -> 'NewSpendingPage':
         self.new_spending_button.click()
@@ -192,11 +282,20 @@ class MainPage(BasePage):
     @property
     def delete_button(self):
         """Делаем пропом, потому что у нее меняется состояние - disabled / enabled"""
-        return self.page.locator('#delete')
+        return self.page.locator(self.DELETE_BUTTON)
+
+    @property
+    def spend_rows(self) -> Locator:
+        return self.page.locator(self.SPEND_ROWS)
 
     @property
     def spend_list(self):
-        return self.page.locator('table tbody tr[role="checkbox"]').all()
+        return self.spend_rows.all()
+
+    @property
+    def spend_count(self) -> int:
+        """Число трат в таблице одним запросом, без разворачивания списка локаторов"""
+        return self.spend_rows.count()
 
     @property
     def profile_tab(self) -> Locator:
@@ -229,6 +328,14 @@ class MainPage(BasePage):
 
 
 class NewSpendingPage(BasePage):
+    AMOUNT_FIELD = '#amount'
+    CURRENCY_FIELD = '#currency'
+    CATEGORY_FIELD = '#category'
+    DATE_FIELD = 'input[name="date"]'
+    DESCRIPTION_FIELD = '#description'
+    CANCEL_BUTTON = '#cancel'
+    SAVE_BUTTON = '#save'
+
     amount_field: Locator
     currency_field: Locator
     category_field: Locator
@@ -241,29 +348,26 @@ class NewSpendingPage(BasePage):
     def __init__(self, page: Page):
         super().__init__(page)
 
-        self.amount_field = self.page.locator('#amount')
-        self.currency_field = self.page.locator('#currency')
-        self.category_field = self.page.locator('#category')
-        self.date_field = self.page.locator('input[name="date"]')
-        self.description_field = self.page.locator('#description')
-        self.cancel_button = self.page.locator('#cancel')
-        self.add_button = self.page.locator('#save')
+        self.amount_field = self.page.locator(self.AMOUNT_FIELD)
+        self.currency_field = self.page.locator(self.CURRENCY_FIELD)
+        self.category_field = self.page.locator(self.CATEGORY_FIELD)
+        self.date_field = self.page.locator(self.DATE_FIELD)
+        self.description_field = self.page.locator(self.DESCRIPTION_FIELD)
+        self.cancel_button = self.page.locator(self.CANCEL_BUTTON)
+        self.add_button = self.page.locator(self.SAVE_BUTTON)
 
         self.check_elements()
 
     def check_elements(self):
-        elements = [
-            (self.amount_field, "Amount field"),
-            (self.currency_field, "Currency field"),
-            (self.category_field, "Category field"),
-            (self.date_field, "Date field"),
-            (self.description_field, "Description field"),
-            (self.cancel_button, "Cancel button"),
-            (self.add_button, "Add button"),
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Amount field": self.AMOUNT_FIELD,
+            "Currency field": self.CURRENCY_FIELD,
+            "Category field": self.CATEGORY_FIELD,
+            "Date field": self.DATE_FIELD,
+            "Description field": self.DESCRIPTION_FIELD,
+            "Cancel button": self.CANCEL_BUTTON,
+            "Add button": self.SAVE_BUTTON,
+        })
 
     @property
     def amount_helper(self) -> Locator:
@@ -283,13 +387,21 @@ class NewSpendingPage(BasePage):
         self.add_button.click()
 
     def add_spend(self, spend: SpendCreate) -> 'MainPage':
-        self.arrange_add_spend(spend)
+        with self.expect_api_response('/api/spends/add', 'POST'), self.expect_api_response('/api/v2/spends/all'):
+            self.arrange_add_spend(spend)
         self.page.wait_for_selector('table[aria-labelledby="tableTitle"]')
-        self.page.wait_for_timeout(500)
         return MainPage(self.page)
 
 
 class EditSpendingPage(BasePage):
+    AMOUNT_FIELD = '#amount'
+    CURRENCY_FIELD = '#currency'
+    CATEGORY_FIELD = '#category'
+    DATE_FIELD = 'input[name="date"]'
+    DESCRIPTION_FIELD = '#description'
+    CANCEL_BUTTON = '#cancel'
+    SAVE_BUTTON = '#save'
+
     amount_field: Locator
     currency_field: Locator
     category_field: Locator
@@ -303,30 +415,27 @@ class EditSpendingPage(BasePage):
     def __init__(self, page: Page):
         super().__init__(page)
 
-        self.amount_field = self.page.locator('#amount')
-        self.currency_field = self.page.locator('#currency')
-        self.category_field = self.page.locator('#category')
-        self.date_field = self.page.locator('input[name="date"]')
-        self.description_field = self.page.locator('#description')
-        self.cancel_button = self.page.locator('#cancel')
-        self.save_changes_button = self.page.locator('#save')
+        self.amount_field = self.page.locator(self.AMOUNT_FIELD)
+        self.currency_field = self.page.locator(self.CURRENCY_FIELD)
+        self.category_field = self.page.locator(self.CATEGORY_FIELD)
+        self.date_field = self.page.locator(self.DATE_FIELD)
+        self.description_field = self.page.locator(self.DESCRIPTION_FIELD)
+        self.cancel_button = self.page.locator(self.CANCEL_BUTTON)
+        self.save_changes_button = self.page.locator(self.SAVE_BUTTON)
         self.spend_uuid = self.page.url.split('/')[-1]
 
         self.check_elements()
 
     def check_elements(self):
-        elements = [
-            (self.amount_field, "Amount field"),
-            (self.currency_field, "Currency field"),
-            (self.category_field, "Category field"),
-            (self.date_field, "Date field"),
-            (self.description_field, "Description field"),
-            (self.cancel_button, "Cancel button"),
-            (self.save_changes_button, "Save changes button"),
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Amount field": self.AMOUNT_FIELD,
+            "Currency field": self.CURRENCY_FIELD,
+            "Category field": self.CATEGORY_FIELD,
+            "Date field": self.DATE_FIELD,
+            "Description field": self.DESCRIPTION_FIELD,
+            "Cancel button": self.CANCEL_BUTTON,
+            "Save changes button": self.SAVE_BUTTON,
+        })
 
     @property
     def amount_helper(self) -> Locator:
@@ -346,59 +455,93 @@ class EditSpendingPage(BasePage):
         self.save_changes_button.click()
 
     def edit_spend(self, spend: SpendCreate) -> 'MainPage':
-        self.arrange_edit_spend(spend)
+        # INFO: the spend list is ready once the edit is saved and the list is re-fetched
+        with self.expect_api_response('/api/spends/edit', 'PATCH'), self.expect_api_response('/api/v2/spends/all'):
+            self.arrange_edit_spend(spend)
         self.page.wait_for_url(re.compile('main'))
-        self.page.wait_for_timeout(1000)  # FIXME: как правильно дождаться страницы со списком трат?
         return MainPage(self.page)
 
 
 class ProfilePage(BasePage):
+    USERNAME_FIELD = '#username'
+    NAME_FIELD = '#name'
+    SAVE_CHANGES_BUTTON = 'button[type="submit"]'
+    NEW_CATEGORY_FIELD = '#category'
+    CATEGORY_ROWS = '.css-17u3xlq'
+    CATEGORY_NAME = 'span.css-14vsv3w'
+    CATEGORY_HEADER_ROWS = 2  # Первые строки CATEGORY_ROWS - не категории
+
     username_field: Locator
     name_field: Locator
     save_changes_button: Locator
     new_category_field: Locator
     categories_list: List[Locator]
+    _category_index: Dict[str, int] | None  # Имя категории -> номер строки в category_rows
 
     def __init__(self, page: Page):
         super().__init__(page)
 
-        self.username_field = self.page.locator('#username')
-        self.save_changes_button = self.page.locator('button[type="submit"]')
-        self.new_category_field = self.page.locator('#category')
+        self.username_field = self.page.locator(self.USERNAME_FIELD)
+        self.save_changes_button = self.page.locator(self.SAVE_CHANGES_BUTTON)
+        self.new_category_field = self.page.locator(self.NEW_CATEGORY_FIELD)
+        self._category_index = None
 
         self.check_elements()
 
     @property
     def name_field(self) -> Locator:
-        return self.page.locator('#name')
+        return self.page.locator(self.NAME_FIELD)
+
+    @property
+    def category_rows(self) -> Locator:
+        return self.page.locator(self.CATEGORY_ROWS)
 
     @property
     def categories_list(self) -> List[Locator]:
-        return self.page.locator('.css-17u3xlq').all()[2:]
+        return self.category_rows.all()[self.CATEGORY_HEADER_ROWS:]
+
+    @property
+    def category_index(self) -> Dict[str, int]:
+        """Индекс категорий по имени, строится одним чтением DOM и сбрасывается при add/archive"""
+        if self._category_index is None:
+            names: List[str | None] = self.category_rows.evaluate_all(CATEGORY_NAMES_JS, self.CATEGORY_NAME)
+            self._category_index = {
+                name: index for index, name in enumerate(names)
+                if index >= self.CATEGORY_HEADER_ROWS and name is not None
+            }
+        return self._category_index
+
+    def invalidate_categories(self) -> None:
+        self._category_index = None
 
     @property
     def add_category_message(self) -> Locator:
         return self.page.locator('div[role="alert"]:has-text("You\'ve added new category")')
 
     def has_category(self, category_name: str) -> bool:
-        """Проверить, есть ли такая категория в списке"""
-        category = next((category for category in self.categories_list if category.locator('span.css-14vsv3w').text_content() == category_name), None)
-        return category is not None
-
-    def get_category(self, category_name: str) -> Locator | None:
-        return next((category for category in self.categories_list if category.locator('span.css-14vsv3w').text_content() == category_name), None)
+        """Проверить, есть ли такая категория в списке (без ожидания, подходит и для проверки отсутствия)"""
+        return category_name in self.category_index
+
+    def get_category(self, category_name: str) -> Locator:
+        """Строка категории. Если её ещё нет в индексе, ждёт её появления (список грузится асинхронно),
+        падает, если категория так и не появилась"""
+        if category_name not in self.category_index:
+            self.wait_for_row(self.category_rows, category_name)
+            self.invalidate_categories()
+        index = self.category_index.get(category_name)
+        if index is None:
+            raise AssertionError(f'Category {category_name} should be in the categories list')
+        return self.category_rows.nth(index)
 
     def check_elements(self):
-        elements = [
-            (self.username_field, "Username field"),
-            (self.name_field, "Name field"),
-            (self.save_changes_button, "Save changes button"),
-            (self.new_category_field, "new category field"),
-            *[(category, "Category") for category in self.categories_list],
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Username field": self.USERNAME_FIELD,
+            "Name field": self.NAME_FIELD,
+            "Save changes button": self.SAVE_CHANGES_BUTTON,
+            "new category field": self.NEW_CATEGORY_FIELD,
+        }, {
+            "Category": (self.CATEGORY_ROWS, self.CATEGORY_HEADER_ROWS),
+        })
 
     def change_name(self, name: str) -> None:
         self.name_field.fill(name)
@@ -413,43 +556,48 @@ class ProfilePage(BasePage):
             self.new_category_field.fill(category)
             self.page.keyboard.press('Enter')
             expect(self.add_category_message).to_be_visible()
+            self.wait_for_row(self.category_rows, category)
+            self.invalidate_categories()
 
     def archive_category(self, category: str) -> None:
-        if self.has_category(category):
-            current_category = self.get_category(category)
-            archive_button = current_category.locator('button[aria-label="Archive category"]')
-            archive_button.click()
-            self.confirm_archive_button.click()
-            expect(self.confirm_archive_button).not_to_be_visible()
+        current_category = self.get_category(category)
+        archive_button = current_category.locator('button[aria-label="Archive category"]')
+        archive_button.click()
+        self.confirm_archive_button.click()
+        expect(self.confirm_archive_button).not_to_be_visible()
+        self.invalidate_categories()
 
 
 class FriendsPage(BasePage):
+    SEARCH_FIELD = 'input[aria-label="search"]'
+    REQUEST_ROWS = '#requests tr'
+    FRIEND_ROWS = '#friends tr'
+    USERNAME_CELL = '.MuiTypography-body1'
+
     search_field: Locator
     request_list: List[Locator]
     friend_list: List[Locator]
 
     def __init__(self, page: Page):
         super().__init__(page)
-        self.search_field = self.page.locator('input[aria-label="search"]')
+        self.search_field = self.page.locator(self.SEARCH_FIELD)
         self.check_elements()
 
     @property
     def request_list(self) -> List[Locator]:
-        return self.page.locator('#requests tr').all()
+        return self.page.locator(self.REQUEST_ROWS).all()
 
     @property
     def friend_list(self) -> List[Locator]:
-        return self.page.locator('#friends tr').all()
+        return self.page.locator(self.FRIEND_ROWS).all()
 
     def check_elements(self):
-        elements = [
-            (self.search_field, "Search field"),
-            *[(request, "Request") for request in self.request_list],
-            *[(friend, "Friend") for friend in self.friend_list],
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Search field": self.SEARCH_FIELD,
+        }, {
+            "Request": self.REQUEST_ROWS,
+            "Friend": self.FRIEND_ROWS,
+        })
 
     def get_corresponding_request(self, username: str) -> Locator:
         """Получить соответствующий запрос от username"""
@@ -457,7 +605,7 @@ class FriendsPage(BasePage):
             raise AssertionError(f'Request list is empty')
 
         corresponding_request: Locator | None = next((request for request in self.request_list if request.locator(
-            '.MuiTypography-body1').text_content() == username), None)
+            self.USERNAME_CELL).text_content() == username), None)
         if corresponding_request is None:
             raise AssertionError(f'No such user with username {username} in request list')
 
@@ -467,10 +615,9 @@ class FriendsPage(BasePage):
         """Принять приглашение в друзья от username"""
         corresponding_request: Locator = self.get_corresponding_request(username)
         accept_button: Locator = corresponding_request.locator('button:has-text("Accept")')
-        accept_button.click()
-        self.page.wait_for_timeout(1000)  # INFO: костыль, а как можно по другому?
-        new_friend: Locator | None = next((friend for friend in self.friend_list if friend.locator('.MuiTypography-body1').text_content() == username), None)
-        assert new_friend is not None
+        with self.expect_api_response('/api/invitations/accept', 'POST'):
+            accept_button.click()
+        self.wait_for_row(self.page.locator(self.FRIEND_ROWS), username)
 
     def decline_request(self, username: str) -> None:
         """Отклонить приглашение в друзья от username"""
@@ -488,7 +635,7 @@ class FriendsPage(BasePage):
             raise AssertionError(f'Friend list is empty')
 
         corresponding_friend: Locator | None = next((friend for friend in self.friend_list if
-                                                     friend.locator('.MuiTypography-body1').text_content() == username),
+                                                     friend.locator(self.USERNAME_CELL).text_content() == username),
                                                     None)
         if corresponding_friend is None:
             raise AssertionError(f'No such user with username {username} in friend list')
@@ -502,26 +649,28 @@ class FriendsPage(BasePage):
 
 
 class AllPeoplePage(BasePage):
+    SEARCH_FIELD = 'input[aria-label="search"]'
+    PEOPLE_ROWS = '#all tr'
+    USERNAME_CELL = '.MuiTypography-body1'
+
     search_field: Locator
     people_list: List[Locator]
 
     def __init__(self, page: Page):
         super().__init__(page)
-        self.search_field = self.page.locator('input[aria-label="search"]')
+        self.search_field = self.page.locator(self.SEARCH_FIELD)
         self.check_elements()
 
     @property
     def people_list(self) -> List[Locator]:
-        return self.page.locator('#all tr').all()
+        return self.page.locator(self.PEOPLE_ROWS).all()
 
     def check_elements(self):
-        elements = [
-            (self.search_field, "Search field"),
-            *[(user, "User") for user in self.people_list],
-        ]
-
-        for element, name in elements:
-            expect(element, f"{name} should be visible").to_be_visible()
+        self.check_visible({
+            "Search field": self.SEARCH_FIELD,
+        }, {
+            "User": self.PEOPLE_ROWS,
+        })
 
     def get_corresponding_user(self, username: str) -> Locator:
         """Получить пользователя с username для приглашения"""
@@ -538,7 +687,7 @@ class AllPeoplePage(BasePage):
         print(f'People length: {len(self.people_list)}')
 
         for user in self.people_list:
-            current_username = user.locator('.MuiTypography-body1').text_content()
+            current_username = user.locator(self.USERNAME_CELL).text_content()
             if current_username == username:
                 return user
 
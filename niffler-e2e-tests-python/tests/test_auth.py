@@ -3,62 +3,65 @@ import re
 import pytest
 from playwright.sync_api import expect
 
+from services.provisioning_service import provisioning_service
 from services.user_service import user_service
+from .timing import step_timer
 
 
 @pytest.mark.active
 def test_login_error(login_page, user):
     """Try to login with unregistered credentials and get error"""
-    # Arrange
-    new_user = user()
-    new_login_page = login_page()
+    with step_timer.phase('arrange'):
+        new_user = user()
+        new_login_page = login_page()
 
     # Act
     new_login_page.arrange_login(new_user)
 
-    # Assert
-    expect(new_login_page.page).to_have_url(re.compile('error'))
+    with step_timer.phase('assert'):
+        expect(new_login_page.page).to_have_url(re.compile('error'))
 
 
 @pytest.mark.active
 def test_register_success(registration_page, user):
     """Try to register successfully"""
-    # Arrange
-    new_user = user()
-    new_registration_page = registration_page()
+    with step_timer.phase('arrange'):
+        new_user = user()
+        new_registration_page = registration_page()
 
     # Act
     new_registration_page.arrange_register_user(new_user)
 
-    # Assert
-    expect(new_registration_page.signin_button).to_be_visible()
-    # DB assert
-    assert user_service.user_exists(new_user.username) is True
-    # Remove user from db
-    user_service.delete_user(new_user.username)
+    with step_timer.phase('assert'):
+        expect(new_registration_page.signin_button).to_be_visible()
+        # DB assert: userdata is filled asynchronously through Kafka
+        assert user_service.await_user_exists(new_user.username) is True
+    # Remove user from auth and userdata databases
+    provisioning_service.deprovision_users([new_user.username])
 
 
 @pytest.mark.active
+@pytest.mark.query_budget(1)
 def test_register_error(registration_page, user):
     """Try to register unsuccessfully"""
-    # Arrange
-    new_user = user(username_length=2, password_length=2)
-    new_registration_page = registration_page()
+    with step_timer.phase('arrange'):
+        new_user = user(username_length=2, password_length=2)
+        new_registration_page = registration_page()
 
     # Act
     new_registration_page.arrange_register_user(new_user)
 
-    # Assert
-    expect(new_registration_page.signin_button).not_to_be_visible()
-    # Check if user is not in db
-    assert user_service.user_exists(new_user.username) is False
+    with step_timer.phase('assert'):
+        expect(new_registration_page.signin_button).not_to_be_visible()
+        # Check if user is not in db
+        assert user_service.user_exists(new_user.username) is False
 
 
 @pytest.mark.active
-def test_login_success(login_page, registered_user):
+def test_login_success(login_page, pooled_user):
     """Try to login successfully with registered credentials"""
-    # Arrange
-    new_login_page = login_page()
+    with step_timer.phase('arrange'):
+        new_login_page = login_page()
 
     # Act
-    new_login_page.login(registered_user)
+    new_login_page.login(pooled_user())
@@ -0,0 +1,23 @@
+import pytest
+
+from .data_factory import DataFactory
+
+
+@pytest.mark.active
+@pytest.mark.parametrize('seed', [0, 1234567])
+def test_unique_names_do_not_collide(seed):
+    """Names of every length from all workers of one run stay unique, also past the point where the counter
+    outgrows the requested length (10 ** 4 names for length 10)"""
+    # Arrange: gw0 / gw35 and gw3 / gw5 used to clash once the worker index and the counter were glued together
+    factories = [DataFactory(seed, worker_id) for worker_id in ('master', 'gw0', 'gw3', 'gw5', 'gw35')]
+
+    # Act
+    names = [
+        factory.unique_name(length)
+        for factory in factories
+        for _ in range(4_000)
+        for length in (7, 10, 12)
+    ]
+
+    # Assert
+    assert len(set(names)) == len(names)
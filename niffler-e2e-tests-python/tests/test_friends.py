@@ -1,14 +1,18 @@
 import pytest
 
 from services.user_service import user_service
+from .async_pages import add_friends_concurrently, run_in_event_loop
+from .timing import step_timer
 
 
 @pytest.mark.active
-def test_add_friend(registered_user, friend_user, login_page):
-    # Arrange
-    main_user = registered_user
-    friend = friend_user
-    first_main_page = login_page().login(main_user)
+@pytest.mark.query_budget(1)
+def test_add_friend(pooled_user, login_page):
+    # Pooled users are clean, their friendships are reset when they return to the pool
+    with step_timer.phase('arrange'):
+        main_user = pooled_user()
+        friend = pooled_user()
+        first_main_page = login_page().login(main_user)
 
     # Act
     first_all_people_page = first_main_page.go_to_all_people_page()  # Go to all people page from 1st user
@@ -19,7 +23,42 @@ def test_add_friend(registered_user, friend_user, login_page):
     second_friends_page.accept_request(main_user.username)
 
     # Asserts in database
-    assert user_service.friend_exists(main_user.username, friend.username) is True
-    # Remove friendship from db
-    user_id = user_service.get_user_id_by_username(main_user.username)
-    user_service.delete_user_friendships(user_id)
+    with step_timer.phase('assert'):
+        assert user_service.friend_exists(main_user.username, friend.username) is True
+
+
+@pytest.mark.active
+def test_add_friend_parallel_sessions(pooled_user, context_pool, auth_states):
+    """Both users' sessions come from the session browser (cached auth states, resource filter, CLI options)
+    and their main pages load in parallel; sending and accepting the invitation stay ordered by nature"""
+    with step_timer.phase('arrange'):
+        main_user = pooled_user()
+        friend = pooled_user()
+        contexts = [context_pool.lease(main_user), context_pool.lease(friend)]
+    try:
+        # Act
+        main_page, friend_main_page = auth_states.open_main_pages(list(zip(contexts, [main_user, friend])))
+        main_page.go_to_all_people_page().send_invitation(friend.username)
+        friend_main_page.go_to_friends_page().accept_request(main_user.username)
+    finally:
+        for context in contexts:
+            context_pool.release(context)
+
+    # Asserts in database
+    with step_timer.phase('assert'):
+        assert user_service.friend_exists(main_user.username, friend.username) is True
+
+
+@pytest.mark.active
+def test_add_friends_concurrently(pooled_user):
+    """Two independent pairs of users become friends at the same time through the async page objects"""
+    with step_timer.phase('arrange'):
+        pairs = [(pooled_user(), pooled_user()) for _ in range(2)]
+
+    # Act
+    run_in_event_loop(add_friends_concurrently(pairs))
+
+    # Asserts in database
+    with step_timer.phase('assert'):
+        for main_user, friend in pairs:
+            assert user_service.friend_exists(main_user.username, friend.username) is True
@@ -0,0 +1,155 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List
+
+import pytest
+
+
+# INFO: pytest phase -> test phase in terms of Arrange / Act / Assert
+PHASES: Dict[str, str] = {
+    'setup': 'arrange',
+    'call': 'act',
+    'teardown': 'teardown',
+}
+
+
+class StepTimer:
+    """Замеры шагов (методы page object и сервисов), привязанные к текущему тесту и фазе"""
+    current_test: str | None
+    current_phase: str | None
+    steps: List[dict]
+    phase_durations: Dict[str, Dict[str, float]]
+    _local: threading.local  # depth: вложенность шагов, phases: время вложенных фаз открытых фаз текущего потока
+    _lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.current_test = None
+        self.current_phase = None
+        self.steps = []
+        self.phase_durations = defaultdict(dict)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Явно отметить фазу внутри теста, например with step_timer.phase('assert'): ...
+
+        Время вложенной фазы вычитается из объемлющей: assert внутри вызова теста не попадает в act.
+        """
+        if not hasattr(self._local, 'phases'):
+            self._local.phases = []
+        phases: List[float] = self._local.phases
+        previous_phase, self.current_phase = self.current_phase, name
+        phases.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            nested = phases.pop()
+            if phases:
+                phases[-1] += duration
+            if self.current_test is not None:
+                durations = self.phase_durations[self.current_test]
+                durations[name] = durations.get(name, 0.0) + duration - nested
+            self.current_phase = previous_phase
+
+    def timed(self, step: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # INFO: depth is thread-local, steps also run in bootstrap / cleanup thread pools
+            depth = getattr(self._local, 'depth', 0)
+            self._local.depth = depth + 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+                with self._lock:
+                    self.steps.append({
+                        'test': self.current_test,
+                        'phase': self.current_phase,
+                        'step': step,
+                        'depth': depth,
+                        'duration': time.perf_counter() - started,
+                    })
+
+        wrapper.__timed__ = True
+        return wrapper
+
+    def instrument(self, classes: Iterable[type]) -> None:
+        """Обернуть все методы классов (включая __init__, где страницы делают goto и check_elements)"""
+        for cls in classes:
+            for name, attr in list(vars(cls).items()):
+                if not inspect.isfunction(attr) or getattr(attr, '__timed__', False):
+                    continue
+                if name.startswith('__') and name != '__init__':
+                    continue
+                setattr(cls, name, self.timed(f'{cls.__name__}.{name}', attr))
+
+    def slowest_steps(self, count: int) -> List[dict]:
+        return sorted(self.steps, key=lambda step: step['duration'], reverse=True)[:count]
+
+    def report(self) -> dict:
+        tests: Dict[str, dict] = {}
+        for test, durations in self.phase_durations.items():
+            tests[test] = {'phases': durations, 'steps': []}
+        for step in self.steps:
+            if step['test'] is not None:
+                tests.setdefault(step['test'], {'phases': {}, 'steps': []})['steps'].append(step)
+        return {'tests': tests}
+
+
+class TimingPlugin:
+    """pytest плагин: замеряет шаги тестов, пишет JSON отчёт и выводит самые медленные шаги"""
+    timer: StepTimer
+    report_path: str
+    top: int
+
+    def __init__(self, timer: StepTimer, report_path: str, top: int) -> None:
+        self.timer = timer
+        self.report_path = report_path
+        self.top = top
+
+    @contextmanager
+    def _test_phase(self, item: pytest.Item, when: str):
+        self.timer.current_test = item.nodeid
+        with self.timer.phase(PHASES[when]):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item: pytest.Item):
+        with self._test_phase(item, 'setup'):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item: pytest.Item):
+        with self._test_phase(item, 'call'):
+            yield
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_teardown(self, item: pytest.Item):
+        with self._test_phase(item, 'teardown'):
+            yield
+        self.timer.current_test = None
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        with open(self.report_path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.timer.report(), report_file, ensure_ascii=False, indent=2)
+
+    def pytest_terminal_summary(self, terminalreporter) -> None:
+        terminalreporter.section(f'slowest {self.top} steps')
+        for step in self.timer.slowest_steps(self.top):
+            terminalreporter.write_line(
+                f'{step["duration"]:8.3f}s {step["phase"] or "-":>9} {step["step"]} ({step["test"] or "session"})'
+            )
+        terminalreporter.write_line(f'Timing report: {self.report_path}')
+
+
+# INFO: module-level timer, so tests can mark an explicit assert phase: with step_timer.phase('assert'): ...
+step_timer = StepTimer()